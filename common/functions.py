@@ -89,6 +89,22 @@ def save(file, filename, extension = None, path = None, overwrite = False):
     import pickle
     import dill # dill is helpful in pickling lambda functions. Attempting to save lambda functions without dill raises an error.
 
+    fullfilename = save_filename(filename, extension = extension, path = path, overwrite = overwrite)
+
+    with open(fullfilename, "wb") as f:
+        pickle.dump(file, f, pickle.HIGHEST_PROTOCOL)
+
+    return
+
+
+# =============================================================================
+
+
+def save_filename(filename, extension = None, path = None, overwrite = False):
+    '''
+    Returns the full filename to which save(file, filename, **kwargs) saves. Raises a FileAlreadyExists exception if the file already exists and overwrite is False. See save for the options.
+    '''
+
     if path is None:
         path="../data/"
         
@@ -108,11 +124,7 @@ def save(file, filename, extension = None, path = None, overwrite = False):
             
             raise exc.FileAlreadyExists('A file already exists on ' + fullfilename + '. Either try a different filename or set overwrite to True.')
             
-
-    with open(fullfilename, "w") as f:
-        pickle.dump(file, f, pickle.HIGHEST_PROTOCOL)
-
-    return
+    return fullfilename
 
 
 # =============================================================================
@@ -124,16 +136,13 @@ def load(filename, extension = None, path = None):
 
     Loads file from disk. Returns the file if successful, and raises an exception otherwise. 
     
-    Note that loads requires both the pickle and dill modules to be installed.
+    Binary eGraphSet files (see common.storage) are loaded with eGraphSet.load. Other files are unpickled, which requires both the pickle and dill modules to be installed.
 
     Options:
         extension - str -   The extension to append to filename. If None, no extension is appended.
         path -      str -   The location from which the file should be loaded. Default: "../data/".
     '''
 
-    import pickle
-    import dill # dill is helpful in pickling lambda functions. Attempting to save lambda functions without dill raises an error.
-
     if path is None:
         path="../data/"
         
@@ -148,8 +157,18 @@ def load(filename, extension = None, path = None):
             
         raise exc.FileDoesntExist('The requested file on ' + fullfilename + ' does not exist.')
             
+    import storage
+    
+    if storage.is_binary_file(fullfilename):
+        
+        from eGraphSet.eGraphSet import eGraphSet
+        
+        return eGraphSet.load(fullfilename, extension = None, path = "")
+
+    import pickle
+    import dill # dill is helpful in pickling lambda functions. Attempting to save lambda functions without dill raises an error.
 
-    with open(fullfilename, "r") as f:
+    with open(fullfilename, "rb") as f:
         file = pickle.load(f)
 
     return file
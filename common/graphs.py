@@ -269,4 +269,20 @@ def triangle(with_base_triangle=True, with_adjacent_edge=False, with_opposite_tr
         adjacent_triangle=set([(0,5),(2,5)])
         edges=edges.union(adjacent_triangle)
         
-    return Graph(list(edges))
\ No newline at end of file
+    return Graph(list(edges))
+
+# =============================================================================
+
+def graph6_sink(f):
+    '''
+    Returns a function that writes the graph it is called on to the file f, one line per graph, in graph6 format, or in sparse6 format if the graph has multiple edges or loops. Each line can be read back by Graph(line).
+    '''
+    
+    def sink(graph):
+        if graph.has_multiple_edges() or graph.has_loops():
+            f.write(graph.sparse6_string() + '\n')
+            
+        else:
+            f.write(graph.graph6_string() + '\n')
+            
+    return sink
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:03:44 2026
+
+@author: Mohamed Laradji
+"""
+
+# =============================================================================
+# This module is a compact store of 64-bit hashes, such as the canonical
+# certificate hashes of common.storage.certificate_hash, used to recognize
+# already generated descendants without keeping them.
+#
+# The hashes are kept in an open-addressing (linear probing) NumPy table of
+# uint64, 8 bytes per slot. If a memory budget is given, a full table is
+# spilled to disk as a sorted run instead of being grown, and lookups binary
+# search the memory-mapped runs; when there are too many runs, they are
+# merged into one.
+# =============================================================================
+
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+
+# =============================================================================
+
+
+class HashStore(object):
+    '''
+    A set of 64-bit hashes, supporting `hash in store`, store.add(hash) and len(store), like a Python set, so it can be passed wherever a set of certificate hashes is expected (for instance, the dedup_store option of Family.streaming_descendants_iterator).
+
+    The hash 0 marks an empty slot, so it is stored as 1: the store cannot distinguish between them.
+    '''
+
+    def __init__(self, capacity = 1024, max_load = 0.5, memory_budget = None, spill_directory = None, max_runs = 8):
+        '''
+        Initialize a HashStore by S = HashStore().
+
+        Options:
+            capacity -          int -   Default: 1024. The initial number of slots of the table, rounded up to a power of 2.
+            max_load -          float - Default: 0.5. The maximum fraction of used slots before the table is grown or spilled. Must be strictly between 0 and 1, so that the table always has an empty slot to end a lookup. Raises a ValueError otherwise.
+            memory_budget -     int -   Default: None. The maximum size in bytes of the table. If None, the table is grown without limit. Otherwise, once the table would exceed memory_budget, its hashes are spilled to disk.
+            spill_directory -   str -   Default: None. The directory of the spilled runs. If None, a temporary directory is created, and removed by self.close.
+            max_runs -          int -   Default: 8. The number of spilled runs above which they are merged into one.
+        '''
+
+        if not 0 < max_load < 1:
+            raise ValueError('max_load must be strictly between 0 and 1, not '+str(max_load)+'.')
+
+        self.table = np.zeros(power_of_two(capacity), dtype = np.uint64)
+        self.table_count = 0
+
+        self.max_load = max_load
+        self.memory_budget = memory_budget
+        self.max_runs = max_runs
+
+        self.spill_directory = spill_directory
+        self.temporary_directory = None
+
+        # The sorted runs spilled to disk, as (filename, memory-mapped array) pairs.
+        self.runs = []
+        self.spilled_runs_count = 0
+
+    def __len__(self):
+        return self.table_count + sum(len(run) for filename, run in self.runs)
+
+    def __contains__(self, hash_value):
+        key = hash_key(hash_value)
+
+        return self.table[self.slot(key)] == key or any(run_contains(run, key) for filename, run in self.runs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *pargs):
+        self.close()
+
+
+# =============================================================================
+
+
+    def slot(self, key):
+        '''
+        Returns the slot of the table holding key, or the empty slot where it would be inserted.
+        '''
+
+        table = self.table
+        mask = len(table) - 1
+        i = int(key) & mask
+
+        while table[i] != 0 and table[i] != key:
+            i = (i + 1) & mask
+
+        return i
+
+    def add(self, hash_value):
+        '''
+        Adds hash_value to self. Returns True if it was not in self already, and False otherwise.
+        '''
+
+        key = hash_key(hash_value)
+
+        i = self.slot(key)
+
+        if self.table[i] == key: return False
+
+        if any(run_contains(run, key) for filename, run in self.runs): return False
+
+        self.table[i] = key
+        self.table_count += 1
+
+        if self.table_count > self.max_load * len(self.table):
+            if self.memory_budget is not None and 2 * self.table.nbytes > self.memory_budget:
+                self.spill()
+
+            else:
+                self.resize(2 * len(self.table))
+
+        return True
+
+    def resize(self, capacity):
+        '''
+        Moves the hashes of the table to a new table of capacity slots.
+        '''
+
+        keys = self.table[self.table != 0]
+
+        self.table = np.zeros(power_of_two(capacity), dtype = np.uint64)
+
+        for key in keys:
+            self.table[self.slot(key)] = key
+
+
+# =============================================================================
+
+
+    def spill(self):
+        '''
+        Writes the hashes of the table to disk as a sorted run, and empties the table. If there are more than self.max_runs runs, they are merged.
+        '''
+
+        if not self.table_count: return
+
+        if self.spill_directory is None:
+            self.temporary_directory = tempfile.mkdtemp(prefix = 'hashstore_')
+            self.spill_directory = self.temporary_directory
+
+        self.add_run(np.sort(self.table[self.table != 0]))
+
+        self.table[:] = 0
+        self.table_count = 0
+
+        if len(self.runs) > self.max_runs:
+            self.merge_runs()
+
+    def add_run(self, keys):
+        '''
+        Saves the sorted array keys as a new run, and memory-maps it.
+        '''
+
+        filename = os.path.join(self.spill_directory, 'run_'+str(self.spilled_runs_count)+'.npy')
+        self.spilled_runs_count += 1
+
+        np.save(filename, keys)
+
+        self.runs.append((filename, np.load(filename, mmap_mode = 'r')))
+
+    def merge_runs(self):
+        '''
+        Merges the runs into one. Note that the merged run is built in memory.
+        '''
+
+        runs, self.runs = self.runs, []
+
+        merged_keys = np.unique(np.concatenate([run for filename, run in runs]))
+
+        self.add_run(merged_keys)
+
+        for filename, run in runs:
+            os.remove(filename)
+
+    def close(self):
+        '''
+        Empties self, and removes the spilled runs, with their directory if it is temporary.
+        '''
+
+        runs, self.runs = self.runs, []
+
+        for filename, run in runs:
+            os.remove(filename)
+
+        if self.temporary_directory is not None:
+            shutil.rmtree(self.temporary_directory, ignore_errors = True)
+            self.temporary_directory = None
+            self.spill_directory = None
+
+        self.table[:] = 0
+        self.table_count = 0
+
+
+# =============================================================================
+#   Functions
+# =============================================================================
+
+
+def hash_key(hash_value):
+    '''
+    Returns hash_value as the uint64 key of a HashStore. 0 is reserved for empty slots, and is mapped to 1.
+    '''
+
+    return np.uint64((int(hash_value) % 2**64) or 1)
+
+
+def run_contains(run, key):
+    '''
+    Returns True if the sorted array run contains key.
+    '''
+
+    i = np.searchsorted(run, key)
+
+    return i < len(run) and run[i] == key
+
+
+def power_of_two(n):
+    '''
+    Returns the least power of 2 greater than or equal to n (and to 2).
+    '''
+
+    capacity = 2
+
+    while capacity < n: capacity *= 2
+
+    return capacity
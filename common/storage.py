@@ -0,0 +1,646 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:20:31 2026
+
+@author: Mohamed Laradji
+"""
+
+# =============================================================================
+# This module reads and writes the binary eGraphSet format (.egs files).
+#
+# A file is a header followed by blocks of records, one record per graph:
+#   header: b'EGSB', uint16 format version, uint32 metadata length, metadata (JSON).
+#   block:  b'BLCK', uint32 number of records k, uint64 payload length, payload.
+#
+# Since format version 2, a file may also contain expansion blocks, written by
+# checkpointed enumerations (see Family.layers_iterator), which record that
+# some members were expanded, and the indexes of their children:
+#   block:  b'EXPN', uint32 number of expansions k, uint64 payload length, payload.
+#
+# The payload stores the records of the block column by column:
+#   fixed columns:      k values each (order, level, triangles_count, flags, certificate_hash).
+#   variable columns:   k+1 int64 offsets, then the values (edges, certificate, parents, automorphism_generators).
+# Every column is padded to a multiple of 8 bytes, and all numbers are little-endian.
+#
+# The columns of a file are listed in its metadata, so that readers do not
+# depend on the columns of the current format version. Blocks are written as
+# soon as they are full, so a file can be written and read one block at a
+# time, and the invariant columns of a block can be read without its edges.
+# Blocks can be appended to an existing file, and an incomplete last block,
+# left by an interrupted write, is ignored by the readers.
+#
+# The vertices of a graph are relabeled 0, 1, ..., n-1, in the order of the
+# graph, and its edges are stored as a flattened (u, v) int32 array. The
+# generators of its automorphism group, if known, are stored as the
+# concatenated lists of the images of 0, 1, ..., n-1 (version 3).
+# =============================================================================
+
+
+import collections
+import hashlib
+import json
+import struct
+
+
+# =============================================================================
+
+
+FORMAT_MAGIC = b'EGSB'
+BLOCK_MAGIC = b'BLCK'
+EXPANSION_MAGIC = b'EXPN'
+
+FORMAT_VERSION = 3
+
+HEADER_STRUCT = struct.Struct('<4sHI')
+BLOCK_STRUCT = struct.Struct('<4sIQ')
+
+FIXED_COLUMNS = (('order', '<i4'), ('level', '<i4'), ('triangles_count', '<i4'), ('flags', '<u1'), ('certificate_hash', '<u8'))
+VARIABLE_COLUMNS = (('edges', '<i4'), ('certificate', '<i4'), ('parents', '<i8'), ('automorphism_generators', '<i4'))
+
+# The columns of the expansion blocks, which do not depend on the file.
+EXPANSION_COLUMNS = {'fixed': (('descendant', '<i8'),), 'variable': (('children', '<i8'),)}
+
+# Bits of the flags column.
+MULTIEDGES = 1
+LOOPS = 2
+EXPANDED = 4
+
+# The value of an integer column which is not available.
+MISSING = -1
+
+Record = collections.namedtuple('Record', [name for name, dtype in FIXED_COLUMNS + VARIABLE_COLUMNS])
+Expansion = collections.namedtuple('Expansion', ['descendant', 'children'])
+
+
+# =============================================================================
+#   Encoding
+# =============================================================================
+
+
+def encode_graph(graph, certificate = None, level = MISSING, triangles_count = MISSING, flags = 0, parents = (), automorphism_generators = None):
+    '''
+    Function encode_graph(graph, **kwargs): Graph -> Record
+
+    Returns the Record of graph. The vertices of graph are relabeled 0, 1, ..., n-1, in the order of graph.
+
+    Options:
+        certificate -   tuple - Default: None. The canonical certificate of graph (see eGraph.canonical_certificate). If None, the certificate and certificate_hash columns are left empty.
+        flags -         int -   Default: 0. Extra bits of the flags column, such as EXPANDED. MULTIEDGES and LOOPS are set from graph.
+        parents -       list -  Default: (). The indexes of the parents of graph in the file.
+        automorphism_generators -   list -  Default: None. The generators of the automorphism group of graph, as functions (or permutations) on the vertices of graph. If None, the column is left empty.
+    '''
+
+    labels = dict((v, i) for i, v in enumerate(graph))
+
+    edges = [labels[v] for e in graph.edge_iterator(labels = False) for v in e]
+
+    if graph.allows_multiple_edges(): flags |= MULTIEDGES
+    if graph.allows_loops(): flags |= LOOPS
+
+    if certificate is None:
+        certificate_edges, hash_value = (), 0
+
+    else:
+        certificate_edges, hash_value = [v for e in certificate[1] for v in e], certificate_hash(certificate)
+
+    images = []
+
+    for generator in automorphism_generators or ():
+        images.extend(labels[generator(v)] for v in graph)
+
+    return Record(graph.order(), level, triangles_count, flags, hash_value, edges, certificate_edges, list(parents), images)
+
+
+def decode_graph(record, graph_class, immutable = True):
+    '''
+    Function decode_graph(record, graph_class): Record, class -> Graph
+
+    Returns the graph of record, as a graph_class object on the vertices 0, 1, ..., order-1.
+    '''
+
+    edges = [(int(u), int(v)) for u, v in zip(record.edges[0::2], record.edges[1::2])]
+
+    graph = graph_class([list(range(0, int(record.order))), edges], format = 'vertices_and_edges', multiedges = bool(record.flags & MULTIEDGES), loops = bool(record.flags & LOOPS), immutable = immutable)
+
+    return graph
+
+
+def decode_certificate(record):
+    '''
+    Returns the canonical certificate stored in record, or None if there is none.
+    '''
+
+    if not len(record.certificate): return None
+
+    certificate = record.certificate
+
+    return (int(record.order), tuple((int(u), int(v)) for u, v in zip(certificate[0::2], certificate[1::2])))
+
+
+def decode_automorphism_generators(record):
+    '''
+    Returns the list of the generators of the automorphism group stored in record, each as the list of the images of 0, 1, ..., order-1, or None if they were not saved.
+    '''
+
+    order = int(record.order)
+    images = record.automorphism_generators
+
+    if not len(images): return None
+
+    return [[int(v) for v in images[i:i+order]] for i in range(0, len(images), order)]
+
+
+def certificate_hash(certificate):
+    '''
+    Function certificate_hash(certificate): tuple -> int
+
+    Returns a 64-bit hash of the canonical certificate (order, edges). Unlike hash(certificate), it is the same across processes and Python versions, so it can be stored.
+    '''
+
+    import numpy as np
+
+    order, edges = certificate
+
+    digest = hashlib.sha1(struct.pack('<q', order) + np.asarray(edges, dtype = '<i4').tobytes()).digest()
+
+    return struct.unpack('<Q', digest[:8])[0]
+
+
+# =============================================================================
+#   Writing
+# =============================================================================
+
+
+class Writer(object):
+    '''
+    Writes records to a binary eGraphSet file, one block at a time. Use as:
+
+        with Writer(f, metadata) as writer:
+            for record in records: writer.write(record)
+
+    where f is a file opened in binary mode.
+    '''
+
+    def __init__(self, f, metadata = dict(), block_size = 4096, auto_flush = True):
+        '''
+        Writes the header of the file, with metadata, which must be JSON serializable. block_size is the number of records per block.
+
+        If metadata is None, no header is written, and the blocks are appended to f, which must be a binary eGraphSet file opened in append mode (see truncate_incomplete_block).
+
+        If auto_flush is False, full blocks are only written by self.flush, so that records are never written without the expansions that refer to them (see truncate_unconfirmed_records).
+        '''
+
+        self.file = f
+        self.block_size = block_size
+        self.auto_flush = auto_flush
+        self.records = []
+        self.expansions = []
+
+        if metadata is None: return
+
+        metadata = dict(metadata)
+        metadata['columns'] = {'fixed': FIXED_COLUMNS, 'variable': VARIABLE_COLUMNS}
+
+        encoded_metadata = json.dumps(metadata, sort_keys = True).encode('utf-8')
+
+        self.file.write(HEADER_STRUCT.pack(FORMAT_MAGIC, FORMAT_VERSION, len(encoded_metadata)))
+        self.file.write(encoded_metadata)
+        self.file.write(padding(HEADER_STRUCT.size + len(encoded_metadata)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *pargs):
+        self.close()
+
+    def write(self, record):
+        '''
+        Adds record to the current block, and writes the block if it is full.
+        '''
+
+        self.records.append(record)
+
+        if self.auto_flush and len(self.records) >= self.block_size: self.flush()
+
+    def write_expansion(self, descendant, children):
+        '''
+        Records that the member of index descendant was expanded, with the members of indexes children as children. The expansion is written after the pending records, so children may be among them.
+        '''
+
+        self.expansions.append(Expansion(descendant, children))
+
+        if self.auto_flush and len(self.expansions) >= self.block_size: self.flush()
+
+    def flush(self, confirm = False):
+        '''
+        Writes the current blocks, if not empty: first the records, block_size per block, and then the expansions, in one block.
+
+        If confirm is True, an expansion block, possibly empty, is written after the records, so that they are kept by truncate_unconfirmed_records.
+        '''
+
+        columns = {'fixed': FIXED_COLUMNS, 'variable': VARIABLE_COLUMNS}
+
+        confirm = confirm and bool(self.records or self.expansions)
+
+        for start in range(0, len(self.records), self.block_size):
+            self.file.write(encode_block(BLOCK_MAGIC, self.records[start:start+self.block_size], columns))
+
+        # The expansions are written as one block, so that they are confirmed together.
+        if self.expansions or confirm:
+            self.file.write(encode_block(EXPANSION_MAGIC, self.expansions, EXPANSION_COLUMNS))
+
+        self.records = []
+        self.expansions = []
+
+    def close(self):
+        '''
+        Writes the last block.
+        '''
+
+        self.flush()
+
+
+def encode_block(magic, rows, columns):
+    '''
+    Returns the bytes of the block of rows, tuples with one value per column of columns, a {'fixed': ..., 'variable': ...} dictionary of (name, dtype) pairs.
+    '''
+
+    import numpy as np
+
+    encoded_columns = []
+
+    for i, (name, dtype) in enumerate(columns['fixed']):
+        encoded_columns.append(np.array([row[i] for row in rows], dtype = dtype).tobytes())
+
+    for i, (name, dtype) in enumerate(columns['variable'], len(columns['fixed'])):
+        values = [row[i] for row in rows]
+
+        offsets = np.zeros(len(values)+1, dtype = '<i8')
+        offsets[1:] = np.cumsum([len(value) for value in values])
+
+        encoded_columns.append(offsets.tobytes() + np.array([v for value in values for v in value], dtype = dtype).tobytes())
+
+    payload = b''.join(column + padding(len(column)) for column in encoded_columns)
+
+    return BLOCK_STRUCT.pack(magic, len(rows), len(payload)) + payload
+
+
+def padding(length):
+    '''
+    Returns the zero bytes needed to pad length bytes to a multiple of 8.
+    '''
+
+    return b'\0' * (-length % 8)
+
+
+# =============================================================================
+#   Reading
+# =============================================================================
+
+
+def read_header(f):
+    '''
+    Function read_header(f): file -> dict
+
+    Reads the header of the binary eGraphSet file f, opened in binary mode, and returns its metadata. Raises a ValueError if f is not a binary eGraphSet file, or if its format version is not supported.
+    '''
+
+    magic, version, metadata_length = HEADER_STRUCT.unpack(f.read(HEADER_STRUCT.size))
+
+    if magic != FORMAT_MAGIC:
+        raise ValueError('Not a binary eGraphSet file.')
+
+    if version > FORMAT_VERSION:
+        raise ValueError('Unsupported format version '+str(version)+'. The latest supported version is '+str(FORMAT_VERSION)+'.')
+
+    metadata = json.loads(f.read(metadata_length).decode('utf-8'))
+    f.read(len(padding(HEADER_STRUCT.size + metadata_length)))
+
+    metadata['format_version'] = version
+
+    return metadata
+
+
+def is_binary_file(filename):
+    '''
+    Returns True if filename is a binary eGraphSet file.
+    '''
+
+    with open(filename, 'rb') as f:
+        return f.read(len(FORMAT_MAGIC)) == FORMAT_MAGIC
+
+
+def decode_block(buffer, offset, metadata):
+    '''
+    Function decode_block(buffer, offset, metadata): buffer, int, dict -> (bytes, int, dict, int)
+
+    Decodes the block of buffer starting at offset, and returns (magic, k, columns, next_offset), where magic is BLOCK_MAGIC or EXPANSION_MAGIC, k is the number of records or expansions, columns is a column name to NumPy array dictionary, and next_offset is the offset of the next block. For a variable column name, columns[name] is the array of values and columns[name+'_offsets'] the offsets of each row.
+
+    The arrays are views of buffer, so nothing is copied.
+    '''
+
+    import numpy as np
+
+    magic, k, payload_length = BLOCK_STRUCT.unpack_from(buffer, offset)
+
+    if magic == BLOCK_MAGIC: column_names = metadata['columns']
+    elif magic == EXPANSION_MAGIC: column_names = EXPANSION_COLUMNS
+    else: raise ValueError('Corrupt binary eGraphSet file: no block at offset '+str(offset)+'.')
+
+    position = offset + BLOCK_STRUCT.size
+    columns = dict()
+
+    for name, dtype in column_names['fixed']:
+        columns[name] = np.frombuffer(buffer, dtype = dtype, count = k, offset = position)
+        position += columns[name].nbytes + len(padding(columns[name].nbytes))
+
+    for name, dtype in column_names['variable']:
+        offsets = np.frombuffer(buffer, dtype = '<i8', count = k+1, offset = position)
+        columns[name+'_offsets'] = offsets
+        columns[name] = np.frombuffer(buffer, dtype = dtype, count = int(offsets[-1]), offset = position + offsets.nbytes)
+
+        length = offsets.nbytes + columns[name].nbytes
+        position += length + len(padding(length))
+
+    return magic, k, columns, offset + BLOCK_STRUCT.size + payload_length
+
+
+def block_records(k, columns, metadata, positions = None):
+    '''
+    Returns the list of the k Records of a block decoded by decode_block, or only of the records at positions in the block if positions is not None.
+    '''
+
+    import numpy as np
+
+    records = []
+
+    if positions is None: positions = range(0, k)
+
+    # The columns missing from files of earlier format versions are empty.
+    defaults = dict((name, MISSING) for name, dtype in FIXED_COLUMNS)
+    defaults.update(flags = 0, certificate_hash = 0)
+    defaults.update((name, np.zeros(0, dtype = dtype)) for name, dtype in VARIABLE_COLUMNS)
+
+    for i in positions:
+        values = dict(defaults)
+
+        for name, dtype in metadata['columns']['fixed']:
+            values[name] = columns[name][i]
+
+        for name, dtype in metadata['columns']['variable']:
+            offsets = columns[name+'_offsets']
+            values[name] = columns[name][offsets[i]:offsets[i+1]]
+
+        records.append(Record(**values))
+
+    return records
+
+
+def block_expansions(k, columns):
+    '''
+    Returns the list of the k Expansions of an expansion block decoded by decode_block.
+    '''
+
+    offsets = columns['children_offsets']
+
+    return [Expansion(int(columns['descendant'][i]), [int(child) for child in columns['children'][offsets[i]:offsets[i+1]]]) for i in range(0, k)]
+
+
+def blocks_iterator(f):
+    '''
+    Function blocks_iterator(f): file -> iterator
+
+    Returns (metadata, iterator), where iterator is an iterator over the (magic, k, columns) blocks of the binary eGraphSet file f, opened in binary mode (see decode_block). Only one block is read in memory at a time, and an incomplete last block is ignored.
+    '''
+
+    metadata = read_header(f)
+
+    def iterator():
+        while True:
+            block_header = f.read(BLOCK_STRUCT.size)
+
+            if len(block_header) < BLOCK_STRUCT.size: return
+
+            magic, k, payload_length = BLOCK_STRUCT.unpack(block_header)
+
+            payload = f.read(payload_length)
+
+            if len(payload) < payload_length: return
+
+            magic, k, columns, _ = decode_block(block_header + payload, 0, metadata)
+
+            yield magic, k, columns
+
+    return metadata, iterator()
+
+
+def records_iterator(f):
+    '''
+    Function records_iterator(f): file -> iterator
+
+    Returns (metadata, iterator), where iterator is an iterator over the Records and Expansions of the binary eGraphSet file f, opened in binary mode, in the order they were written. No graph is constructed; see decode_graph.
+    '''
+
+    metadata, blocks = blocks_iterator(f)
+
+    def iterator():
+        for magic, k, columns in blocks:
+            if magic == BLOCK_MAGIC: rows = block_records(k, columns, metadata)
+            else: rows = block_expansions(k, columns)
+
+            for row in rows:
+                yield row
+
+    return metadata, iterator()
+
+
+def truncate_incomplete_block(filename):
+    '''
+    Truncates the binary eGraphSet file filename after its last complete block, so that blocks can be appended to it after an interrupted write. Returns the number of records of the file.
+    '''
+
+    import os
+
+    length = os.path.getsize(filename)
+
+    with open(filename, 'r+b') as f:
+        read_header(f)
+
+        offset, records_count = f.tell(), 0
+
+        while offset + BLOCK_STRUCT.size <= length:
+            magic, k, payload_length = BLOCK_STRUCT.unpack(f.read(BLOCK_STRUCT.size))
+
+            if offset + BLOCK_STRUCT.size + payload_length > length: break
+
+            if magic == BLOCK_MAGIC: records_count += k
+
+            offset += BLOCK_STRUCT.size + payload_length
+            f.seek(offset)
+
+        f.truncate(offset)
+
+    return records_count
+
+
+def truncate_unconfirmed_records(filename):
+    '''
+    Truncates the binary eGraphSet file filename after its last complete expansion block, or after its header if it has none. Returns the number of records of the file.
+
+    A checkpoint (see eGraphSet.Family.layers_iterator) is written by Writer.flush(confirm = True), which writes the records and then the expansions that refer to them. If the writing is interrupted in between, the records are in the file but the expansions of their parents are not, and the parents would be expanded again on resume, adding the records a second time. Dropping every record after the last expansion block keeps the records and expansions of the file consistent.
+    '''
+
+    import os
+
+    length = os.path.getsize(filename)
+
+    with open(filename, 'r+b') as f:
+        read_header(f)
+
+        offset = confirmed_offset = f.tell()
+        records_count = confirmed_records_count = 0
+
+        while offset + BLOCK_STRUCT.size <= length:
+            magic, k, payload_length = BLOCK_STRUCT.unpack(f.read(BLOCK_STRUCT.size))
+
+            if offset + BLOCK_STRUCT.size + payload_length > length: break
+
+            offset += BLOCK_STRUCT.size + payload_length
+            f.seek(offset)
+
+            if magic == BLOCK_MAGIC:
+                records_count += k
+
+            else:
+                confirmed_offset, confirmed_records_count = offset, records_count
+
+        f.truncate(confirmed_offset)
+
+    return confirmed_records_count
+
+
+# =============================================================================
+#   Memory-mapped reading
+# =============================================================================
+
+
+class MappedFile(object):
+    '''
+    A memory-mapped binary eGraphSet file, whose records can be looked up by index. Opening the file only reads its header and the headers of its blocks, and the columns of a block are NumPy views of the mapped file, so a query only touches the pages of the columns it reads.
+    '''
+
+    def __init__(self, filename):
+        '''
+        Maps the binary eGraphSet file filename, and indexes its blocks.
+        '''
+
+        import mmap
+
+        self.filename = filename
+        self.file = open(filename, 'rb')
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+
+        self.metadata = read_header(self.buffer)
+
+        # The offsets of the record blocks, the number of records before each of them, and the offsets of the expansion blocks.
+        self.blocks = []
+        self.block_starts = []
+        self.expansion_blocks = []
+        self.columns_cache = dict()
+
+        offset, records_count = self.buffer.tell(), 0
+
+        while offset + BLOCK_STRUCT.size <= len(self.buffer):
+            magic, k, payload_length = BLOCK_STRUCT.unpack_from(self.buffer, offset)
+
+            # An incomplete last block is ignored.
+            if offset + BLOCK_STRUCT.size + payload_length > len(self.buffer): break
+
+            if magic == BLOCK_MAGIC:
+                self.blocks.append(offset)
+                self.block_starts.append(records_count)
+                records_count += k
+
+            elif magic == EXPANSION_MAGIC:
+                self.expansion_blocks.append(offset)
+
+            else:
+                raise ValueError('Corrupt binary eGraphSet file: no block at offset '+str(offset)+'.')
+
+            offset += BLOCK_STRUCT.size + payload_length
+
+        self.records_count = records_count
+
+    def __len__(self):
+        return self.records_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *pargs):
+        self.close()
+
+    def block_columns(self, block):
+        '''
+        Returns (k, columns) for the block-th block (see decode_block). The views are kept, so each block is decoded once.
+        '''
+
+        if block not in self.columns_cache:
+            _, k, columns, _ = decode_block(self.buffer, self.blocks[block], self.metadata)
+            self.columns_cache[block] = (k, columns)
+
+        return self.columns_cache[block]
+
+    def blocks_iterator(self):
+        '''
+        Returns an iterator over the (first record index, k, columns) of the blocks of self.
+        '''
+
+        for block in range(0, len(self.blocks)):
+            k, columns = self.block_columns(block)
+            yield self.block_starts[block], k, columns
+
+    def expansions_iterator(self):
+        '''
+        Returns an iterator over the Expansions of self, in the order they were written.
+        '''
+
+        for offset in self.expansion_blocks:
+            _, k, columns, _ = decode_block(self.buffer, offset, self.metadata)
+
+            for expansion in block_expansions(k, columns):
+                yield expansion
+
+    def record(self, index):
+        '''
+        Returns the Record of index. Negative indexes count from the end, as for lists.
+        '''
+
+        import bisect
+
+        if index < 0: index += self.records_count
+
+        if not 0 <= index < self.records_count:
+            raise IndexError('Record index out of range.')
+
+        block = bisect.bisect_right(self.block_starts, index) - 1
+        k, columns = self.block_columns(block)
+
+        return block_records(k, columns, self.metadata, [index - self.block_starts[block]])[0]
+
+    def close(self):
+        '''
+        Unmaps and closes the file. The columns returned so far must no longer be used.
+        '''
+
+        self.columns_cache.clear()
+
+        try:
+            self.buffer.close()
+
+        except BufferError:
+            # Views of the buffer are still referenced; the mapping is released with them.
+            pass
+
+        self.file.close()
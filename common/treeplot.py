@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:04:51 2026
+
+@author: Mohamed Laradji
+"""
+
+# =============================================================================
+# This module renders family trees (see eGraphSet.FamilyTree) of thousands to
+# millions of members, which the sage acyclic layout cannot handle.
+#
+# The layout is computed directly from the orders and levels of the members:
+# each order is a layer, a DTE going from one layer to the next, and the
+# members of a layer are sorted by level. Edges between the same pair of
+# (order, level) groups are bundled through a common control point. The
+# rendering is streamed to an SVG file, without building the drawing in
+# memory, or drawn with matplotlib for other formats (PNG, PDF, ...).
+#
+# For very large trees, the members of each (order, level) group can be
+# aggregated into one node, sized by the number of members.
+# =============================================================================
+
+
+import numpy as np
+
+
+# =============================================================================
+#   Layout
+# =============================================================================
+
+
+def layered_layout(orders, levels, width = 1000., layer_height = 100.):
+    '''
+    Returns (x, y), the NumPy arrays of the coordinates of the vertices of a family tree, given the arrays of their orders and levels. The vertices of each order form a horizontal layer, with y = (order - min(orders))*layer_height, and are evenly spread over width, sorted by level and then by position.
+    '''
+
+    orders = np.asarray(orders, dtype = np.int64)
+    levels = np.asarray(levels, dtype = np.int64)
+
+    n = len(orders)
+
+    x = np.zeros(n)
+
+    if not n: return x, np.zeros(0)
+
+    sorting = np.lexsort((np.arange(n), levels, orders))
+    sorted_orders = orders[sorting]
+
+    layer_starts = np.searchsorted(sorted_orders, sorted_orders, side = 'left')
+    layer_sizes = np.searchsorted(sorted_orders, sorted_orders, side = 'right') - layer_starts
+
+    x[sorting] = (np.arange(n) - layer_starts + 0.5) / layer_sizes * width
+
+    y = (orders - orders.min()) * float(layer_height)
+
+    return x, y
+
+
+def group_ids(orders, levels):
+    '''
+    Returns (ids, group_orders, group_levels), where ids is the array of the indexes of the (order, level) groups of the vertices, and group_orders and group_levels are the arrays of the orders and levels of the groups, sorted.
+    '''
+
+    pairs = np.stack([np.asarray(orders, dtype = np.int64), np.asarray(levels, dtype = np.int64)], axis = 1).reshape(-1, 2)
+
+    groups, ids = np.unique(pairs, axis = 0, return_inverse = True)
+
+    return ids.reshape(-1), groups[:, 0], groups[:, 1]
+
+
+def bundle_points(sources, targets, x, y, ids):
+    '''
+    Returns (bx, by), the arrays of the control points of the edges from sources to targets. The edges between the same pair of groups (as given by ids, the array of the group of every vertex) share the mean of their midpoints as control point, so that they are drawn as one bundle.
+    '''
+
+    sources = np.asarray(sources, dtype = np.int64)
+    targets = np.asarray(targets, dtype = np.int64)
+
+    if not len(sources): return np.zeros(0), np.zeros(0)
+
+    keys = ids[sources] * (int(ids.max()) + 1) + ids[targets]
+
+    _, bundles = np.unique(keys, return_inverse = True)
+
+    bundle_sizes = np.bincount(bundles)
+
+    bx = np.bincount(bundles, weights = (x[sources] + x[targets]) / 2.) / bundle_sizes
+    by = np.bincount(bundles, weights = (y[sources] + y[targets]) / 2.) / bundle_sizes
+
+    return bx[bundles], by[bundles]
+
+
+def aggregate_groups(orders, levels, sources, targets):
+    '''
+    Returns the level of detail aggregate of a family tree, where the vertices of each (order, level) group are merged into one vertex, as a dict with the keys:
+        'orders', 'levels', 'sizes' -       The arrays of the orders, levels and numbers of vertices of the groups.
+        'sources', 'targets', 'counts' -    The arrays of the edges between groups, and of the numbers of edges of the tree they stand for.
+    '''
+
+    ids, group_orders, group_levels = group_ids(orders, levels)
+
+    sources = np.asarray(sources, dtype = np.int64)
+    targets = np.asarray(targets, dtype = np.int64)
+
+    groups_count = len(group_orders)
+
+    keys, counts = np.unique(ids[sources] * groups_count + ids[targets], return_counts = True)
+
+    return {
+        'orders': group_orders,
+        'levels': group_levels,
+        'sizes': np.bincount(ids, minlength = groups_count),
+        'sources': keys // groups_count,
+        'targets': keys % groups_count,
+        'counts': counts,
+        }
+
+
+# =============================================================================
+#   Rendering
+# =============================================================================
+
+
+def render_tree(filename, orders, levels, sources, targets, aggregate = False, bundle = True, width = 1000., layer_height = 100., node_radius = 2., chunk_size = 65536):
+    '''
+    Renders the family tree whose vertices have the given orders and levels, and whose edges go from sources to targets (arrays of vertex positions), with the layered layout of layered_layout.
+
+    If filename ends with .svg, the drawing is streamed to it, chunk_size elements at a time. If filename is another file name, the drawing is saved by matplotlib, which must be installed, in the format of its extension. If filename is None, the matplotlib Figure is returned instead.
+
+    Options:
+        aggregate -     bool -  Default: False. If True, the vertices of each (order, level) group are drawn as one node, with an area proportional to their number, and the edges between groups as one edge, with a width increasing with the number of edges (see aggregate_groups).
+        bundle -        bool -  Default: True. If True, the edges between the same pair of (order, level) groups are bundled (see bundle_points). Otherwise, they are drawn as straight lines.
+        node_radius -   float - Default: 2. The radius of a node of one vertex.
+    '''
+
+    if aggregate:
+        groups = aggregate_groups(orders, levels, sources, targets)
+
+        orders, levels, sources, targets = groups['orders'], groups['levels'], groups['sources'], groups['targets']
+
+        radii = node_radius * np.sqrt(groups['sizes'])
+        edge_widths = 0.5 * (1. + np.log2(groups['counts']))
+
+    else:
+        radii = np.full(len(orders), float(node_radius))
+        edge_widths = np.full(len(sources), 0.5)
+
+    x, y = layered_layout(orders, levels, width = width, layer_height = layer_height)
+
+    sources = np.asarray(sources, dtype = np.int64)
+    targets = np.asarray(targets, dtype = np.int64)
+
+    if bundle and not aggregate:
+        bx, by = bundle_points(sources, targets, x, y, group_ids(orders, levels)[0])
+
+    else:
+        bx, by = (x[sources] + x[targets]) / 2., (y[sources] + y[targets]) / 2.
+
+    # The drawing is shifted so that the nodes are not clipped.
+    margin = 2. * float(max(radii.max() if len(radii) else 0., node_radius))
+    height = (y.max() if len(y) else 0.) + 2. * margin
+
+    x, bx = x + margin, bx + margin
+    y, by = y + margin, by + margin
+
+    if filename is not None and filename.lower().endswith('.svg'):
+        with open(filename, 'w') as f:
+            write_svg(f, x, y, sources, targets, bx, by, radii, edge_widths, width + 2. * margin, height, chunk_size = chunk_size)
+
+        return filename
+
+    figure = matplotlib_figure(x, y, sources, targets, bx, by, radii, edge_widths, width + 2. * margin, height)
+
+    if filename is None: return figure
+
+    figure.savefig(filename)
+
+    return filename
+
+
+def write_svg(f, x, y, sources, targets, bx, by, radii, edge_widths, width, height, chunk_size = 65536):
+    '''
+    Writes the SVG drawing of a family tree to the file f: the edges from sources to targets as quadratic Bezier curves with control points (bx, by) and widths edge_widths, and the vertices at (x, y) as circles of radii radii. The drawing is written chunk_size elements at a time.
+    '''
+
+    f.write('<svg xmlns="http://www.w3.org/2000/svg" width="%.1f" height="%.1f" viewBox="0 0 %.1f %.1f">\n' % (width, height, width, height))
+
+    f.write('<g fill="none" stroke="#4c72b0" stroke-opacity="0.4">\n')
+
+    for start in range(0, len(sources), chunk_size):
+        chunk = slice(start, start + chunk_size)
+
+        s, t = sources[chunk], targets[chunk]
+
+        f.writelines('<path d="M%.1f %.1fQ%.1f %.1f %.1f %.1f" stroke-width="%.2f"/>\n' % edge for edge in zip(x[s], y[s], bx[chunk], by[chunk], x[t], y[t], edge_widths[chunk]))
+
+    f.write('</g>\n<g fill="#dd8452">\n')
+
+    for start in range(0, len(x), chunk_size):
+        chunk = slice(start, start + chunk_size)
+
+        f.writelines('<circle cx="%.1f" cy="%.1f" r="%.2f"/>\n' % node for node in zip(x[chunk], y[chunk], radii[chunk]))
+
+    f.write('</g>\n</svg>\n')
+
+
+def matplotlib_figure(x, y, sources, targets, bx, by, radii, edge_widths, width, height, samples = 8):
+    '''
+    Returns the matplotlib Figure of the drawing of write_svg. The Bezier curves are drawn as polylines of samples segments.
+    '''
+
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import LineCollection
+
+    figure = Figure(figsize = (width / 100., height / 100.), dpi = 100)
+    FigureCanvasAgg(figure)
+
+    axes = figure.add_axes([0, 0, 1, 1])
+    axes.set_xlim(0, width)
+    axes.set_ylim(height, 0)
+    axes.axis('off')
+
+    # The points of the quadratic Bezier curves, as an (edges, samples+1, 2) array.
+    t = np.linspace(0., 1., samples + 1)[np.newaxis, :]
+
+    def curve(start, control, end):
+        return (1-t)**2 * start[:, np.newaxis] + 2*(1-t)*t * control[:, np.newaxis] + t**2 * end[:, np.newaxis]
+
+    segments = np.stack([curve(x[sources], bx, x[targets]), curve(y[sources], by, y[targets])], axis = 2)
+
+    axes.add_collection(LineCollection(segments, linewidths = edge_widths, colors = '#4c72b0', alpha = 0.4))
+
+    # Marker areas are in points squared, and a point is 1/72 inch.
+    axes.scatter(x, y, s = np.pi * (radii * 0.72)**2, c = '#dd8452', linewidths = 0, zorder = 2)
+
+    return figure
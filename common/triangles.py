@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:40 2026
+
+@author: Mohamed Laradji
+"""
+
+# =============================================================================
+# This module enumerates triangles, triangle and edges (AKA Tadpole(3,1)) and
+# double triangles directly from the adjacency of a graph, instead of with
+# Graph.subgraph_search_iterator. Multiple edges and loops are disregarded.
+#
+# The vertex tuples follow the conventions of common.graphs:
+#   triangle and edge:  (v0, v1, v2, v3), with triangle (v0, v1, v2) and edge (v1, v3).
+#   double triangle:    (v0, v1, v2, v3), with triangles (v0, v1, v2) and (v0, v2, v3).
+# =============================================================================
+
+
+# =============================================================================
+#   Adjacency
+# =============================================================================
+
+
+def adjacency(G):
+    '''
+    Function adjacency(G): Graph -> dict
+
+    Returns a vertex to set of neighbors dictionary of G. Multiple edges are counted once and loops are disregarded.
+    '''
+
+    adjacency = dict()
+
+    for v in G:
+        adjacency[v] = neighbors(G, v)
+
+    return adjacency
+
+
+def neighbors(G, v):
+    '''
+    Returns the set of neighbors of v in G, other than v.
+    '''
+
+    neighbors = set(G.neighbor_iterator(v))
+    neighbors.discard(v)
+
+    return neighbors
+
+
+class LazyAdjacency(dict):
+    '''
+    A vertex to set of neighbors dictionary of G, as adjacency(G), except that the neighbors of a vertex are only calculated when first looked up. This is meant for the local updates below, which only look at a few vertices.
+    '''
+
+    def __init__(self, G):
+        super(LazyAdjacency, self).__init__()
+        self.graph = G
+
+    def __missing__(self, v):
+        self[v] = neighbors(self.graph, v)
+        return self[v]
+
+
+# =============================================================================
+#   Triangles
+# =============================================================================
+
+
+def triangles_iterator(G, adjacency_dict = None):
+    '''
+    Returns an iterator over the triangles of G, each given once as a 3-tuple of vertices.
+
+    Options:
+        adjacency_dict -    dict -  The adjacency(G) dictionary, if already calculated.
+    '''
+
+    if adjacency_dict is None:
+        adjacency_dict = adjacency(G)
+
+    # Vertices are ranked by their position in G, so that each triangle is found from its first vertex only.
+    rank = dict((v, i) for i, v in enumerate(adjacency_dict))
+
+    for u in adjacency_dict:
+        later_neighbors = [v for v in adjacency_dict[u] if rank[v] > rank[u]]
+
+        for v in later_neighbors:
+            for w in adjacency_dict[v]:
+                if rank[w] > rank[v] and w in adjacency_dict[u]:
+                    yield (u, v, w)
+
+
+def triangles_set(G, adjacency_dict = None):
+    '''
+    Function triangles_set(G): Graph -> frozenset
+
+    Returns the frozenset of the triangles of G, each as a frozenset of vertices.
+    '''
+
+    return frozenset(frozenset(triangle) for triangle in triangles_iterator(G, adjacency_dict))
+
+
+def multigraph_triangles_count(G, adjacency_dict = None):
+    '''
+    Function multigraph_triangles_count(G): Graph -> int
+
+    Returns the number of triangles of G, where multiple edges are counted with multiplicity: each triangle (u, v, w) of the underlying simple graph counts m(u,v)*m(v,w)*m(u,w) times, m being the edge multiplicity. Loops are disregarded. For loopless graphs, this is trace(A**3)/6, A being the adjacency matrix of G, but it only looks at the edges of G.
+
+    Options:
+        adjacency_dict -    dict -  The adjacency(G) dictionary, if already calculated.
+    '''
+
+    multiplicities = dict()
+
+    for u, v in G.edge_iterator(labels = False):
+        if u == v: continue
+
+        edge = frozenset([u, v])
+        multiplicities[edge] = multiplicities.get(edge, 0) + 1
+
+    triangles_count = 0
+
+    for u, v, w in triangles_iterator(G, adjacency_dict):
+        triangles_count += multiplicities[frozenset([u, v])] * multiplicities[frozenset([v, w])] * multiplicities[frozenset([u, w])]
+
+    return triangles_count
+
+
+def batch_triangles_count(edges, graph_ids, graphs_count = None):
+    '''
+    Function batch_triangles_count(edges, graph_ids): array, array -> array
+
+    Counts the triangles of many graphs at once, with multiple edges counted with multiplicity as in multigraph_triangles_count. Returns an integer array whose i-th entry is the number of triangles of graph i.
+
+    The graphs are given as a stacked edge array: edges is an (E, 2) integer array of all the edges of all the graphs, and graph_ids is the length E array of the graph of each edge. The vertices of each graph are expected to be 0, 1, ..., n-1. See stack_edges.
+
+    The count is vectorized with NumPy: all the pairs of edges at a vertex are formed at once, and the edges closing them are looked up in the sorted array of all edges. Each triangle is thus found once from each of its vertices. This is efficient for graphs of bounded degree, such as 4-regular graphs.
+
+    Note that this requires the numpy module to be installed.
+
+    Options:
+        graphs_count -  int -   Default: None. The number of graphs. If None, it is max(graph_ids)+1.
+    '''
+
+    import numpy as np
+
+    edges = np.asarray(edges, dtype = np.int64).reshape(-1, 2)
+    graph_ids = np.asarray(graph_ids, dtype = np.int64)
+
+    if graphs_count is None:
+        graphs_count = int(graph_ids.max()) + 1 if len(graph_ids) else 0
+
+    triangles_counts = np.zeros(graphs_count, dtype = np.int64)
+
+    if not len(edges): return triangles_counts
+
+    # The vertices of different graphs are made distinct by offsetting them, so that all the graphs form one graph.
+    orders = np.zeros(graphs_count, dtype = np.int64)
+    np.maximum.at(orders, graph_ids, edges.max(axis = 1) + 1)
+
+    offsets = np.cumsum(orders) - orders
+    vertices_count = int(orders.sum())
+
+    vertex_graph_ids = np.repeat(np.arange(graphs_count), orders)
+
+    u = edges[:, 0] + offsets[graph_ids]
+    v = edges[:, 1] + offsets[graph_ids]
+
+    not_loop = u != v
+    u, v = u[not_loop], v[not_loop]
+
+    # Each edge is keyed by its ends, so that multiple edges are merged with their multiplicity.
+    edge_keys, multiplicities = np.unique(np.minimum(u, v) * vertices_count + np.maximum(u, v), return_counts = True)
+
+    low, high = edge_keys // vertices_count, edge_keys % vertices_count
+
+    # Both directions of each edge, sorted by source vertex.
+    sources = np.concatenate([low, high])
+    targets = np.concatenate([high, low])
+    weights = np.concatenate([multiplicities, multiplicities])
+
+    order = np.argsort(sources, kind = 'stable')
+    sources, targets, weights = sources[order], targets[order], weights[order]
+
+    degrees = np.bincount(sources, minlength = vertices_count)
+    starts = np.cumsum(degrees) - degrees
+
+    # Every directed edge is paired with the later directed edges from the same source.
+    positions = np.arange(len(sources)) - starts[sources]
+    later_counts = degrees[sources] - positions - 1
+
+    first = np.repeat(np.arange(len(sources)), later_counts)
+    second = first + 1 + np.arange(len(first)) - np.repeat(np.cumsum(later_counts) - later_counts, later_counts)
+
+    a, b = targets[first], targets[second]
+
+    closing_keys = np.minimum(a, b) * vertices_count + np.maximum(a, b)
+    closing_indices = np.minimum(np.searchsorted(edge_keys, closing_keys), len(edge_keys) - 1)
+    closing_multiplicities = np.where(edge_keys[closing_indices] == closing_keys, multiplicities[closing_indices], 0)
+
+    np.add.at(triangles_counts, vertex_graph_ids[sources[first]], weights[first] * weights[second] * closing_multiplicities)
+
+    return triangles_counts // 3
+
+
+def stack_edges(graphs):
+    '''
+    Function stack_edges(graphs): iterable of Graph -> array, array
+
+    Returns the stacked edge array (edges, graph_ids) of graphs, as expected by batch_triangles_count. The vertices of each graph are relabeled 0, 1, ..., n-1 in the order of the graph.
+
+    Note that this requires the numpy module to be installed.
+    '''
+
+    import numpy as np
+
+    edges = []
+    graph_ids = []
+
+    for graph_id, G in enumerate(graphs):
+        labels = dict((v, i) for i, v in enumerate(G))
+
+        for u, v in G.edge_iterator(labels = False):
+            edges.append((labels[u], labels[v]))
+            graph_ids.append(graph_id)
+
+    return np.array(edges, dtype = np.int64).reshape(-1, 2), np.array(graph_ids, dtype = np.int64)
+
+
+def triangles_at(vertices, adjacency_dict):
+    '''
+    Returns the set of the triangles, as frozensets, that have a vertex in vertices. Only the neighborhoods of vertices and of their neighbors are looked up in adjacency_dict.
+    '''
+
+    triangles = set()
+
+    for u in vertices:
+        for v in adjacency_dict[u]:
+            for w in adjacency_dict[u].intersection(adjacency_dict[v]):
+                triangles.add(frozenset([u, v, w]))
+
+    return triangles
+
+
+def update_triangles(triangles, adjacency_dict, changed_vertices, removed_vertices = ()):
+    '''
+    Returns the triangles of a graph after a local modification, given its triangles before the modification, as returned by triangles_set, and adjacency_dict, its adjacency after the modification (for instance, a LazyAdjacency).
+
+    changed_vertices must contain the ends of all the edges added or deleted by the modification, and removed_vertices the deleted vertices. Only the triangles at changed_vertices are recalculated.
+    '''
+
+    stale_vertices = set(changed_vertices).union(removed_vertices)
+
+    kept_triangles = [triangle for triangle in triangles if stale_vertices.isdisjoint(triangle)]
+
+    return frozenset(kept_triangles).union(triangles_at(changed_vertices, adjacency_dict))
+
+
+def triangle_and_edge_iterator(G, adjacency_dict = None):
+    '''
+    Returns an iterator over the triangle and edges of G, as (v0, v1, v2, v3) tuples, where (v0, v1, v2) is a triangle and (v1, v3) an edge with v3 not in the triangle.
+
+    Each triangle and edge is given once: (v2, v1, v0, v3), which is the same subgraph, is not given.
+
+    Options:
+        adjacency_dict -    dict -  The adjacency(G) dictionary, if already calculated.
+    '''
+
+    if adjacency_dict is None:
+        adjacency_dict = adjacency(G)
+
+    for triangle in triangles_iterator(G, adjacency_dict):
+        for i in range(0, 3):
+            v0, v1, v2 = triangle[i-1], triangle[i], triangle[(i+1)%3]
+
+            for v3 in adjacency_dict[v1]:
+                if v3 != v0 and v3 != v2:
+                    yield (v0, v1, v2, v3)
+
+
+def is_triangle_and_edge(G, e1, e2):
+    '''
+    Returns True if e1 is an edge of a triangle of G, e2 an edge whose first vertex is the vertex of the triangle opposite to e1, and e2[1] is not in the triangle. Returns False otherwise.
+
+    This is the same as cg.triangle_and_edge(e1, e2).is_subgraph(G, induced = False), without building the subgraph.
+    '''
+
+    v0, v2 = e1
+    v1, v3 = e2
+
+    if len(set([v0, v1, v2, v3])) < 4: return False
+
+    return G.has_edge(v0, v2) and G.has_edge(v0, v1) and G.has_edge(v1, v2) and G.has_edge(v1, v3)
+
+
+# =============================================================================
+#   Double triangles
+# =============================================================================
+
+
+def double_triangle_iterator(G, not_triple_triangle = True, adjacency_dict = None):
+    '''
+    Returns an iterator over the double triangles of G, as (v0, v1, v2, v3) tuples, where (v0, v2) is the common edge of the triangles (v0, v1, v2) and (v0, v2, v3). As with Graph.subgraph_search_iterator(cg.double_triangle()), each double triangle is given in all four orders that keep this form.
+
+    Options:
+        not_triple_triangle -   bool -  Default: True. If True, the double triangles that are part of triple triangles, that is whose common edge is in at least three triangles, are not given.
+
+        adjacency_dict -        dict -  The adjacency(G) dictionary, if already calculated.
+    '''
+
+    if adjacency_dict is None:
+        adjacency_dict = adjacency(G)
+
+    for v0 in adjacency_dict:
+        for v2 in adjacency_dict[v0]:
+
+            common_neighbors = adjacency_dict[v0].intersection(adjacency_dict[v2])
+
+            if len(common_neighbors) < 2: continue
+
+            if not_triple_triangle and len(common_neighbors) > 2: continue
+
+            for v1 in common_neighbors:
+                for v3 in common_neighbors:
+                    if v1 != v3:
+                        yield (v0, v1, v2, v3)
+
+
+def edge_double_triangle(v0, v2, adjacency_dict, not_triple_triangle = True):
+    '''
+    Returns a double triangle (v0, v1, v2, v3) of common edge (v0, v2), as given by double_triangle_iterator, or None if there is none. Only the neighborhoods of v0 and v2 are looked up in adjacency_dict.
+
+    Options:
+        not_triple_triangle -   bool -  Default: True. If True, returns None if (v0, v2) is the common edge of a triple triangle.
+    '''
+
+    common_neighbors = adjacency_dict[v0].intersection(adjacency_dict[v2])
+
+    if len(common_neighbors) < 2: return None
+
+    if not_triple_triangle and len(common_neighbors) > 2: return None
+
+    v1, v3 = sorted(common_neighbors)[:2]
+
+    return (v0, v1, v2, v3)
+
+
+def edges_at(vertices, adjacency_dict):
+    '''
+    Returns the list of the edges (u, v) with u in vertices, each edge given once. Only the neighborhoods of vertices are looked up in adjacency_dict.
+    '''
+
+    edges = set()
+
+    for u in vertices:
+        for v in adjacency_dict[u]:
+            edges.add(frozenset([u, v]))
+
+    return [tuple(edge) for edge in edges]
+
+
+
+# =============================================================================
+#   Triangle types
+# =============================================================================
+
+
+def triangle_types(G, adjacency_dict = None):
+    '''
+    Function triangle_types(G): Graph -> list
+
+    Classifies all triangle and edges of G by triangle type in a single pass. Returns a list of (triangle_and_edge, triangle_type, edge_pair) tuples, one per triangle and edge (v0, v1, v2, v3) given by triangle_and_edge_iterator, where edge_pair is ((v0, v2), (v1, v3)), the edges that a double triangle expansion subdivides.
+
+    The types are the same as with triangle_type, but the common neighbors of the triangle edge (v0, v2) are only calculated once for all the edges (v1, v3).
+
+    Options:
+        adjacency_dict -    dict -  The adjacency(G) dictionary, if already calculated.
+    '''
+
+    if adjacency_dict is None:
+        adjacency_dict = adjacency(G)
+
+    triangle_types = []
+
+    for triangle in triangles_iterator(G, adjacency_dict):
+        triangle_types.extend(_triangle_types_of(triangle, adjacency_dict))
+
+    return triangle_types
+
+
+def update_triangle_types(triangle_types, adjacency_dict, changed_vertices, removed_vertices = ()):
+    '''
+    Returns the triangle_types table of a graph after a local modification, given the table before the modification, and adjacency_dict, the adjacency after the modification. changed_vertices and removed_vertices are as in update_triangles.
+
+    The type of a triangle and edge only depends on the neighborhoods of its vertices. So only the entries of the triangles at changed_vertices or at their neighbors are recalculated, and the other entries are kept.
+    '''
+
+    region = set(changed_vertices)
+
+    for v in changed_vertices:
+        region.update(adjacency_dict[v])
+
+    stale_vertices = region.union(removed_vertices)
+
+    updated_triangle_types = [entry for entry in triangle_types if stale_vertices.isdisjoint(entry[0][0:3])]
+
+    for triangle in triangles_at(region, adjacency_dict):
+        updated_triangle_types.extend(_triangle_types_of(tuple(triangle), adjacency_dict))
+
+    return updated_triangle_types
+
+
+def _triangle_types_of(triangle, adjacency_dict):
+    '''
+    Returns the list of triangle_types entries of the triangle and edges with triangle as their triangle.
+    '''
+
+    triangle_types = []
+
+    for i in range(0, 3):
+        v0, v1, v2 = triangle[i-1], triangle[i], triangle[(i+1)%3]
+
+        base_adjacent_vertices = adjacency_dict[v0].intersection(adjacency_dict[v2])
+        base_adjacent_vertices.discard(v1)
+
+        for v3 in adjacency_dict[v1]:
+            if v3 == v0 or v3 == v2: continue
+
+            adjacent_vertices = base_adjacent_vertices.difference([v3])
+            opposite_vertices = adjacency_dict[v1].intersection(adjacency_dict[v3]).difference([v0, v2])
+
+            triangle_types.append(((v0, v1, v2, v3), _type_from_neighbors(opposite_vertices, adjacent_vertices), ((v0, v2), (v1, v3))))
+
+    return triangle_types
+
+
+def triangle_type(triangle_and_edge, adjacency_dict):
+    '''
+    Function triangle_type(triangle_and_edge, adjacency_dict): 4-tuple, dict -> int
+
+    Returns the type (1, 2, 3 or 4) of the triangle and edge (v0, v1, v2, v3) with respect to double triangle expansion, as defined by cg.triangle_type: the least type whose pattern cg.triangle_type(type, with_adjacent_edge = True) has an occurrence in which the triangle and edge is (v0, v1, v2, v3).
+
+    The patterns add to the triangle and edge an opposite triangle (v1, v3, v4), an adjacent triangle (v0, v2, v5), or both, with v4 and v5 new and distinct vertices. They are checked from the neighborhoods of the vertices only.
+    '''
+
+    v0, v1, v2, v3 = triangle_and_edge
+
+    opposite_vertices = adjacency_dict[v1].intersection(adjacency_dict[v3]).difference([v0, v2])
+    adjacent_vertices = adjacency_dict[v0].intersection(adjacency_dict[v2]).difference([v1, v3])
+
+    return _type_from_neighbors(opposite_vertices, adjacent_vertices)
+
+
+def _type_from_neighbors(opposite_vertices, adjacent_vertices):
+    '''
+    Returns the triangle type of a triangle and edge (v0, v1, v2, v3), given the sets of candidates for v4, the common neighbors of v1 and v3 other than v0 and v2, and for v5, the common neighbors of v0 and v2 other than v1 and v3.
+    '''
+
+    if opposite_vertices and adjacent_vertices:
+        # Type I needs v4 != v5, which fails only if both have the same single choice.
+        if len(opposite_vertices.union(adjacent_vertices)) > 1: return 1
+
+    if adjacent_vertices: return 2
+
+    if opposite_vertices: return 3
+
+    return 4
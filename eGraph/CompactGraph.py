@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:05:12 2026
+
+@author: Mohamed Laradji
+"""
+
+# =============================================================================
+# Import statements
+# =============================================================================
+
+# imports from built-ins
+
+import numpy as np
+
+# imports from common
+from common import triangles as ct
+
+# object imports
+
+from eGraph import eGraph
+from DTEGraph import InvalidDTE, InvalidDTR
+
+# =============================================================================
+# Class definitions
+# =============================================================================
+
+
+class CompactGraph(object):
+    '''
+    A compact 4-regular graph, to hold many graphs in memory, for instance the members of a large family loaded for analysis, and to convert them from and to eGraphs. It is not used by the enumeration (DTEGraph.children_iterator, Family.layers_iterator), which works on eGraphs and their sage canonical certificates.
+
+    The graph is stored as an n x 4 NumPy array of neighbors, the row of vertex v holding the four neighbors of v (with repetition for multiple edges). The vertices are always 0, 1, ..., n-1. There are no counts, count_functions or other attributes, and the graph is never modified in place: DTE and DTR return new graphs.
+
+    Convert from an eGraph (or any sage Graph) with CompactGraph.from_graph, and back with self.to_graph.
+    '''
+
+    __slots__ = ('neighbors',)
+
+    degree = 4
+
+    def __init__(self, neighbors):
+        '''
+        Initialize a CompactGraph by G = CompactGraph(neighbors), where neighbors is an n x 4 array (or list of lists) of neighbors.
+        '''
+
+        self.neighbors = np.asarray(neighbors, dtype = np.int32).reshape(-1, self.degree)
+
+# =============================================================================
+
+    @classmethod
+    def from_graph(cls, graph):
+        '''
+        Returns the CompactGraph of the 4-regular graph. The vertices are relabeled 0, 1, ..., n-1, in the order of graph. Raises a ValueError if graph is not 4-regular or has loops.
+        '''
+
+        labels = dict((v, i) for i, v in enumerate(graph))
+
+        neighbors = [[] for v in labels]
+
+        for u, v in graph.edge_iterator(labels = False):
+            if u == v:
+                raise ValueError('graph must not have loops.')
+
+            neighbors[labels[u]].append(labels[v])
+            neighbors[labels[v]].append(labels[u])
+
+        if any(len(row) != cls.degree for row in neighbors):
+            raise ValueError('graph must be '+str(cls.degree)+'-regular.')
+
+        return cls(neighbors)
+
+# =============================================================================
+
+    def to_graph(self, graph_class = eGraph, immutable = False):
+        '''
+        Returns self as a graph of class graph_class.
+        '''
+
+        return graph_class([(u, v) for u, v in self.edge_iterator()], multiedges = self.has_multiple_edges(), immutable = immutable)
+
+# =============================================================================
+#   Graph interface
+# =============================================================================
+
+    def __iter__(self):
+        return iter(range(0, self.order()))
+
+    def __len__(self):
+        return self.order()
+
+    def __repr__(self):
+        return 'CompactGraph on '+str(self.order())+' vertices'
+
+    def order(self):
+        '''
+        Returns the number of vertices of self.
+        '''
+
+        return self.neighbors.shape[0]
+
+    def size(self):
+        '''
+        Returns the number of edges of self.
+        '''
+
+        return self.order() * self.degree // 2
+
+    def neighbor_iterator(self, v):
+        '''
+        Returns an iterator over the neighbors of v, with repetition for multiple edges.
+        '''
+
+        return iter(self.neighbors[v].tolist())
+
+    def has_edge(self, u, v):
+        '''
+        Returns True if u and v are adjacent, and False otherwise.
+        '''
+
+        return bool((self.neighbors[u] == v).any())
+
+    def has_multiple_edges(self):
+        '''
+        Returns True if self has multiple edges, and False otherwise.
+        '''
+
+        return any(len(set(row)) < len(row) for row in self.neighbors.tolist())
+
+    def edge_iterator(self, labels = False):
+        '''
+        Returns an iterator over the edges (u, v), u <= v, of self, with repetition for multiple edges. labels is ignored, and only accepted for compatibility with Graph.edge_iterator.
+        '''
+
+        for u, row in enumerate(self.neighbors.tolist()):
+            for v in row:
+                if u < v: yield (u, v)
+
+    def edges(self):
+        '''
+        Returns the sorted list of the edges of self.
+        '''
+
+        return sorted(self.edge_iterator())
+
+# =============================================================================
+#   Triangles
+# =============================================================================
+
+    def triangles_iterator(self):
+        '''
+        Returns an iterator over the triangles of self (see common.triangles.triangles_iterator).
+        '''
+
+        return ct.triangles_iterator(self)
+
+    def triangles_count(self):
+        '''
+        Returns the number of triangles of self, with multiple edges counted with multiplicity (see common.triangles.multigraph_triangles_count).
+        '''
+
+        return ct.multigraph_triangles_count(self)
+
+    def level(self):
+        '''
+        Returns order-triangles_count.
+        '''
+
+        return self.order() - self.triangles_count()
+
+    def DTE_edge_pairs_iterator(self):
+        '''
+        Returns an iterator over the (triangle edge, path edge) pairs of the triangle and edges of self.
+        '''
+
+        for v0, v1, v2, v3 in ct.triangle_and_edge_iterator(self):
+            yield ((v0, v2), (v1, v3))
+
+    def double_triangle_iterator(self, not_triple_triangle = True):
+        '''
+        Returns an iterator over the double triangles of self (see common.triangles.double_triangle_iterator).
+        '''
+
+        return ct.double_triangle_iterator(self, not_triple_triangle = not_triple_triangle)
+
+# =============================================================================
+#   Double triangle expansion and reduction
+# =============================================================================
+
+    def is_triangle_and_edge(self, e1, e2):
+        '''
+        Returns True if e1 and e2 are, in either order, the triangle edge and the path edge of a triangle and edge of self.
+        '''
+
+        for triangle_edge, path_edge in [(e1, e2), (e2, e1)]:
+            for path_edge in [path_edge, path_edge[::-1]]:
+                if ct.is_triangle_and_edge(self, triangle_edge, path_edge): return True
+
+        return False
+
+    def double_triangle_expansion(self, e1, e2, check_if_DTE = True):
+        '''
+        Returns the DTE of self at e1 and e2: e1 and e2 are subdivided and the two new vertices identified into the new vertex n. self is unchanged.
+
+        Options:
+            check_if_DTE -  bool -  Default: True. If True, raises an InvalidDTE exception if the DTE is not valid.
+        '''
+
+        if check_if_DTE and not self.is_triangle_and_edge(e1, e2):
+            raise InvalidDTE('e1, e2 are not edges of a triangle and edge (Tadpole(3,1)) subgraph of '+str(self)+'.')
+
+        n = self.order()
+
+        neighbors = np.empty((n+1, self.degree), dtype = self.neighbors.dtype)
+        neighbors[:n] = self.neighbors
+
+        for a, b in [e1, e2]:
+            replace_neighbor(neighbors[a], b, n)
+            replace_neighbor(neighbors[b], a, n)
+
+        neighbors[n] = [e1[0], e1[1], e2[0], e2[1]]
+
+        return CompactGraph(neighbors)
+
+    def DTE(self, *pargs, **kwargs):
+        '''
+        Alias for double_triangle_expansion.
+        '''
+
+        return self.double_triangle_expansion(*pargs, **kwargs)
+
+    def double_triangle_reduction(self, double_triangle, check_if_DTR = True):
+        '''
+        Returns the DTR of self at double_triangle, a 4-tuple of vertices with positions 0 and 2 the vertices of the common edge, as in DTEGraph.double_triangle_reduction. self is unchanged.
+
+        The vertex v2 is removed, and the last vertex of self is relabeled v2, so that the vertices remain 0, 1, ..., n-2.
+
+        Options:
+            check_if_DTR -  bool -  Default: True. If True, raises an InvalidDTR exception if double_triangle is not a double triangle of self.
+        '''
+
+        v0, v1, v2, v3 = double_triangle
+
+        if check_if_DTR and not all(self.has_edge(u, v) for u, v in [(v0, v1), (v1, v2), (v0, v2), (v0, v3), (v2, v3)]):
+            raise InvalidDTR(str(double_triangle)+' is not a double triangle of '+str(self)+'.')
+
+        # u is the fourth neighbor of v2, which becomes a neighbor of v0.
+        other_neighbors = self.neighbors[v2].tolist()
+
+        for v in [v0, v1, v3]:
+            other_neighbors.remove(v)
+
+        u = other_neighbors[0]
+
+        neighbors = self.neighbors.copy()
+
+        replace_neighbor(neighbors[v0], v2, u)
+        replace_neighbor(neighbors[v1], v2, v3)
+        replace_neighbor(neighbors[v3], v2, v1)
+        replace_neighbor(neighbors[u], v2, v0)
+
+        last_vertex = self.order() - 1
+
+        if v2 != last_vertex:
+            neighbors[v2] = neighbors[last_vertex]
+            neighbors[neighbors == last_vertex] = v2
+
+        return CompactGraph(neighbors[:last_vertex])
+
+    def DTR(self, *pargs, **kwargs):
+        '''
+        Alias for double_triangle_reduction.
+        '''
+
+        return self.double_triangle_reduction(*pargs, **kwargs)
+
+# =============================================================================
+#   Canonical labelling
+# =============================================================================
+
+    def canonical_labelling(self):
+        '''
+        Returns (certificate, labels), where labels is a canonical labelling of self, as a list whose v-th entry is the new label of v, and certificate is the sorted tuple of the relabeled edges. Two CompactGraphs are isomorphic if and only if their certificates are equal.
+
+        The labelling is computed directly, by individualization and refinement: the vertices are colored by iterated refinement of their neighbors' colors, and, while a color class has several vertices, each of its vertices is individualized in turn. The least certificate over all the resulting discrete colorings is kept.
+
+        Two discrete colorings with the same certificate give an automorphism of self. The search is pruned with them: when a color class is split, a vertex is skipped if an automorphism fixing the individualized vertices maps an already individualized vertex of the class to it, since both searches give the same certificates.
+
+        Note that these certificates are only comparable with other CompactGraph certificates, not with eGraph.canonical_certificate.
+        '''
+
+        rows = self.neighbors.tolist()
+        edges = list(self.edge_iterator())
+
+        # The first and the best (certificate, colors) leaves of the search.
+        leaves = dict()
+        automorphisms = []
+
+        def search(colors, individualized):
+            colors = refine_colors(colors, rows)
+
+            if len(set(colors)) == len(colors):
+                certificate = tuple(sorted((min(colors[u], colors[v]), max(colors[u], colors[v])) for u, v in edges))
+
+                for leaf_certificate, leaf_colors in leaves.values():
+                    if leaf_certificate == certificate:
+                        automorphisms.append(leaf_automorphism(colors, leaf_colors))
+                        break
+
+                leaves.setdefault('first', (certificate, colors))
+
+                if 'best' not in leaves or certificate < leaves['best'][0]:
+                    leaves['best'] = (certificate, colors)
+
+                return
+
+            # The first color class with several vertices is split, which does not depend on the labels of self.
+            color_sizes = dict()
+
+            for color in colors:
+                color_sizes[color] = color_sizes.get(color, 0) + 1
+
+            target_color = min(color for color in color_sizes if color_sizes[color] > 1)
+
+            searched = []
+
+            for v, color in enumerate(colors):
+                if color != target_color: continue
+
+                if searched:
+                    orbit = orbit_function(automorphisms, individualized, len(colors))
+
+                    if any(orbit(w) == orbit(v) for w in searched): continue
+
+                search([(c, 0 if w == v else 1) for w, c in enumerate(colors)], individualized + [v])
+                searched.append(v)
+
+        search([0]*self.order(), [])
+
+        return leaves['best']
+
+    def canonical_certificate(self):
+        '''
+        Returns the certificate of self.canonical_labelling().
+        '''
+
+        return self.canonical_labelling()[0]
+
+    def canonical_label(self):
+        '''
+        Returns the canonically relabeled copy of self.
+        '''
+
+        _, labels = self.canonical_labelling()
+
+        neighbors = np.empty_like(self.neighbors)
+
+        for v, row in enumerate(self.neighbors.tolist()):
+            neighbors[labels[v]] = sorted(labels[u] for u in row)
+
+        return CompactGraph(neighbors)
+
+# =============================================================================
+#   Standalone functions
+# =============================================================================
+
+
+def replace_neighbor(row, old_neighbor, new_neighbor):
+    '''
+    Replaces one occurrence of old_neighbor by new_neighbor in row, a row of a CompactGraph neighbors array. Raises a ValueError if old_neighbor is not in row.
+    '''
+
+    positions = np.flatnonzero(row == old_neighbor)
+
+    if not len(positions):
+        raise ValueError(str(old_neighbor)+' is not in '+str(row)+'.')
+
+    row[positions[0]] = new_neighbor
+
+
+def leaf_automorphism(colors, other_colors):
+    '''
+    Returns the automorphism, as a list whose v-th entry is the image of v, mapping the discrete coloring colors to the discrete coloring other_colors, which give the same certificate in CompactGraph.canonical_labelling.
+    '''
+
+    vertices = [None]*len(other_colors)
+
+    for v, color in enumerate(other_colors):
+        vertices[color] = v
+
+    return [vertices[color] for color in colors]
+
+
+def orbit_function(automorphisms, fixed_vertices, n):
+    '''
+    Returns a function mapping each of the vertices 0, 1, ..., n-1 to a representative of its orbit under the group generated by the automorphisms which fix every vertex of fixed_vertices.
+    '''
+
+    representatives = list(range(0, n))
+
+    def representative(v):
+        while representatives[v] != v:
+            representatives[v] = representatives[representatives[v]]
+            v = representatives[v]
+
+        return v
+
+    for automorphism in automorphisms:
+        if any(automorphism[v] != v for v in fixed_vertices): continue
+
+        for v, w in enumerate(automorphism):
+            representatives[representative(v)] = representative(w)
+
+    return representative
+
+
+def refine_colors(colors, rows):
+    '''
+    Returns the coarsest refinement of the vertex coloring colors in which vertices of the same color have the same multiset of neighbor colors. rows is the list of neighbor lists of the vertices. The new colors are 0, 1, ..., and depend only on the colors and the graph, not on the labels of the vertices.
+    '''
+
+    colors = rank(colors)
+
+    while True:
+        signatures = [(colors[v], tuple(sorted(colors[u] for u in rows[v]))) for v in range(0, len(rows))]
+
+        refined_colors = rank(signatures)
+
+        if len(set(refined_colors)) == len(set(colors)):
+            return refined_colors
+
+        colors = refined_colors
+
+
+def rank(keys):
+    '''
+    Returns the list of the ranks of keys among the distinct values of keys.
+    '''
+
+    ranks = dict((key, i) for i, key in enumerate(sorted(set(keys))))
+
+    return [ranks[key] for key in keys]
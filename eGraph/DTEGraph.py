@@ -17,7 +17,7 @@ Created on Sat Jul  22 15:53:21 2018
 # imports 
 
 import copy
-#import collections
+import collections
 
 # imports from sage
 from sage.graphs.graph import Graph
@@ -33,16 +33,17 @@ from sage.graphs.graph_generators import graphs
 
 # imports from common
 from common import graphs as cg
+from common import triangles as ct
 from common.functions import classproperty
 #import common.functions as f
 #from common.exceptions import NotSubgraph, Underdefined
-#from common.exceptions import UnsupportedOption
+from common.exceptions import UnsupportedOption
 
 # object imports
 
 #from search.Family import Family
 
-from eGraph import classproperty, eGraph, eGraph_copy
+from eGraph import classproperty, eGraph, eGraph_copy, canonical_certificate
 from eGraphSet.eGraphSet import eGraphSet
 
 # =============================================================================
@@ -63,6 +64,13 @@ class DTEGraph(eGraph):
         extra_attributes['family'] = None
         return extra_attributes
     
+    @classproperty
+    def preset_count_functions(cls):
+        preset_count_functions = super(DTEGraph, cls).preset_count_functions
+        preset_count_functions['triangles'] = ct.triangles_set
+        preset_count_functions['triangle_types'] = ct.triangle_types
+        return preset_count_functions
+    
     def __init__(self, data = None, family = None, **kwargs):
         '''
         Can be initialized the same way as a sage Graph object.
@@ -127,31 +135,95 @@ class DTEGraph(eGraph):
     
  # =============================================================================   
 
-    def children_iterator(self, only_nonisomorphic = False, **kwargs):
+    def children_iterator(self, only_nonisomorphic = False, canonical_augmentation = False, orbit_pruning = False, orbit_sizes = False, edge_pair_provider = None, **kwargs):
         '''
         Calculates and returns an iterator over the children of self.
         
         Options:
             only_nonisomorphic -    bool -      If False, returns all labeled children. If true, removes isomorphic copies.
             
-            edge_pair_provider -    function -  Expects a function that takes a graph as input. This option can be used to only expand certain triangles of self.
+            canonical_augmentation -    bool -  Default: False. If True, only the children for which the DTE is the canonical expansion are returned (see self.is_canonical_expansion). Then, if only_nonisomorphic is also True and the parents are pairwise non-isomorphic, every isomorphism class of children is returned by exactly one parent, so no comparison between the children of different parents is needed.
+            
+            orbit_pruning -     bool -      Default: False. If True, only one edge pair per orbit of the automorphism group of self is expanded (see self.DTE_edge_pair_orbits), since edge pairs in the same orbit give isomorphic children. Only use when labeled children are not needed.
+            
+            orbit_sizes -       bool -      Default: False. If True, yields (child, orbit_size) pairs instead, where orbit_size is the number of edge pairs in the orbit of the edge pair giving child. It is always 1 if orbit_pruning is False.
+            
+            edge_pair_provider -    function -  Default: None. Expects a function that takes a graph as input, and returns an iterable of the (e1, e2) edge pairs to expand. This option can be used to only expand certain triangles of self. If None, self.DTE_edge_pairs_iterator(**kwargs) is used.
         '''
+        
+        if edge_pair_provider is None:
+            DTE_edge_pairs = self.DTE_edge_pairs_iterator(**kwargs)
             
-        DTE_edge_pairs = self.DTE_edge_pairs_iterator(**kwargs)
+        else:
+            DTE_edge_pairs = edge_pair_provider(self)
         
-        children = eGraphSet()
+        if orbit_pruning:
+            DTE_edge_pairs = self.DTE_edge_pair_orbits(DTE_edge_pairs)
             
-        for edge_pair in DTE_edge_pairs:
+        else:
+            DTE_edge_pairs = ((edge_pair, 1) for edge_pair in DTE_edge_pairs)
+        
+        # The keys of the children already returned: their canonical certificates if only_nonisomorphic is True, and their edge lists otherwise, so that labelled children are not canonicalized.
+        returned_keys = set()
+            
+        for edge_pair, orbit_size in DTE_edge_pairs:
             
-            #try:
-                
             child = self.double_triangle_expansion(edge_pair[0], edge_pair[1], new_graph = True)
             
-            duplicate_graph = None
+            if canonical_augmentation and not self.is_canonical_expansion(child, edge_pair[0], edge_pair[1]): continue
+            
+            # The certificate is cached in child.counts, so that it is reused when child is added to a family.
+            if only_nonisomorphic: key = child.canonical_certificate()
+            else: key = tuple(sorted(child.edges(labels = False)))
+            
+            if key in returned_keys: continue
             
-            duplicate_graph = children.add_graph(child, require_nonisomorphic = only_nonisomorphic)
+            returned_keys.add(key)
+            
+            if orbit_sizes: yield child, orbit_size
+            else: yield child
                 
-            if duplicate_graph is None: yield child
+
+# =============================================================================
+
+    def DTE_edge_pair_orbits(self, edge_pairs):
+        '''
+        Partitions edge_pairs into orbits under the automorphism group of self, which is calculated once. Returns a list of (edge_pair, orbit_size) pairs, one per orbit, where edge_pair is the first edge pair of the orbit in edge_pairs and orbit_size the number of distinct edge pairs of edge_pairs in the orbit.
+        
+        Edge pairs are considered unordered, as are the vertices of each edge, since neither order changes the DTE.
+        '''
+        
+        # Distinct edge pairs, in the order they first appear.
+        representatives = collections.OrderedDict()
+        
+        for edge_pair in edge_pairs:
+            key = edge_pair_key(edge_pair[0], edge_pair[1])
+            if key not in representatives: representatives[key] = edge_pair
+        
+        # The orbits are found by a union-find over the images of the edge pairs under the generators of the group.
+        roots = dict((key, key) for key in representatives)
+        
+        def find(key):
+            while roots[key] != key:
+                roots[key] = roots[roots[key]]
+                key = roots[key]
+            return key
+        
+        generators = self.automorphism_group().gens()
+        
+        for key in representatives:
+            for generator in generators:
+                image = edge_pair_key(*[[generator(v) for v in edge] for edge in key])
+                
+                if image in roots:
+                    roots[find(image)] = find(key)
+                    
+        orbits = collections.OrderedDict()
+        
+        for key in representatives:
+            orbits.setdefault(find(key), []).append(key)
+            
+        return [(representatives[keys[0]], len(keys)) for keys in orbits.values()]
                 
 
 # =============================================================================
@@ -189,7 +261,10 @@ class DTEGraph(eGraph):
                 raise InvalidDTE('e1, e2 are not edges of a triangle and edge (Tadpole(3,1)) subgraph of '+str(self)+'.')
                 
         if new_graph:
-            child = self.copy(immutable = False)
+            # The triangles of self are calculated once, and then inherited by every child with a local update (see self.crossing_into_vertex).
+            self.triangles()
+            
+            child = self.ecopy(immutable = False)
             
         else:
             child = self
@@ -204,20 +279,11 @@ class DTEGraph(eGraph):
     def double_triangle_iterator(self, not_triple_triangle = True):
         '''
         Returns an iterator over the double triangles of self. If not_triple_triangle is True, it will remove the double triangles that are also part of triple triangles.
-        '''
-
         
-        if not_triple_triangle:
-            triple_triangles = set()
-            for triple_triangle in self.subgraph_search_iterator(cg.triple_triangle()):
-                triple_triangles.add(tuple(triple_triangle[0:4]))
+        The double triangles are enumerated directly from the adjacency of self (see common.triangles.double_triangle_iterator).
+        '''
         
-        for double_triangle in self.subgraph_search_iterator(cg.double_triangle()):
-            double_triangle = tuple(double_triangle)
-            
-            if not_triple_triangle and double_triangle in triple_triangles: continue
-                
-            yield double_triangle
+        return ct.double_triangle_iterator(self, not_triple_triangle = not_triple_triangle)
     
 # =============================================================================
 
@@ -237,35 +303,212 @@ class DTEGraph(eGraph):
         
         if new_graph: parent = self.ecopy(immutable = False)
         else: parent = self
+        
+        triangle_counts = parent.cached_triangle_counts()
+        
+        # The edges at v2 are moved to v0, so the neighbors of v2 are changed too.
+        changed_vertices = set([v0, v1, v3]).union(parent.neighbor_iterator(v2))
+        changed_vertices.discard(v2)
             
         parent.delete_edges([(v0,v2),(v1,v2),(v3,v2)])
         parent.add_edge(v1,v3)
         parent.identify_vertices(v0,v2)
         
+        parent.update_triangle_counts(triangle_counts, changed_vertices, removed_vertices = [v2])
+        
         return parent
     
+# =============================================================================
+
+    def crossing_into_vertex(self, e1, e2):
+        '''
+        Subdivides e1, e2 and identifies the resultant degree 2 vertices. Returns the new vertex that was created.
+        
+        Same as eGraph.crossing_into_vertex, except that the triangles and triangle types of self, if already calculated, are updated from the neighborhood of the new vertex rather than recalculated (see self.update_triangle_counts).
+        '''
+        
+        triangle_counts = self.cached_triangle_counts()
+        
+        new_vertex = super(DTEGraph, self).crossing_into_vertex(e1, e2)
+        
+        self.update_triangle_counts(triangle_counts, set(e1).union(e2).union([new_vertex]))
+        
+        return new_vertex
+    
+# =============================================================================
+
+    def cached_triangle_counts(self):
+        '''
+        Returns a dict of the currently valid 'triangles' and 'triangle_types' counts of self, with None for the ones that are not calculated. Meant to be called before a modification, and passed to self.update_triangle_counts after it.
+        '''
+        
+        return dict((count_name, self.cached_count(count_name)) for count_name in ['triangles', 'triangle_types'])
+    
+# =============================================================================
+
+    def update_triangle_counts(self, triangle_counts, changed_vertices, removed_vertices = ()):
+        '''
+        Updates the 'triangles', 'triangles_count' and 'triangle_types' counts of self after a local modification, from triangle_counts, as returned by self.cached_triangle_counts before the modification. Only the neighborhoods of changed_vertices are looked at (see common.triangles.update_triangles and common.triangles.update_triangle_types).
+        
+        Counts that were not calculated before the modification are left to be calculated when needed.
+        '''
+        
+        adjacency = ct.LazyAdjacency(self)
+        
+        if triangle_counts['triangles'] is not None:
+            triangles = ct.update_triangles(triangle_counts['triangles'], adjacency, changed_vertices, removed_vertices)
+            
+            self.set_count('triangles', triangles)
+            
+            # Multiple edges change the triangles count, but not the triangles.
+            if not self.has_multiple_edges():
+                self.set_count('triangles_count', len(triangles))
+                
+        if triangle_counts['triangle_types'] is not None:
+            self.set_count('triangle_types', ct.update_triangle_types(triangle_counts['triangle_types'], adjacency, changed_vertices, removed_vertices))
+            
+        return
+    
+# =============================================================================
+
+    def canonical_double_triangle(self, not_triple_triangle = True):
+        '''
+        Returns the canonical double triangle of self, as a 4-tuple in the format of self.double_triangle_reduction, or None if self has no double triangles. If not_triple_triangle is True, the double triangles that are part of triple triangles are not considered.
+        
+        The canonical double triangle is the one whose vertices have the least labels in self.canonical_label(). Thus, an isomorphism between two graphs maps the canonical double triangle of one to a double triangle equivalent to the canonical double triangle of the other.
+        '''
+        
+        _, labels = self.canonical_label(certificate = True)
+        
+        canonical_double_triangle = None
+        canonical_key = None
+        
+        for double_triangle in self.double_triangle_iterator(not_triple_triangle = not_triple_triangle):
+            
+            v0, v1, v2, v3 = double_triangle
+            
+            # v1 and v3 play the same role in a DTR, so their order is disregarded.
+            key = (labels[v0], labels[v2], min(labels[v1], labels[v3]), max(labels[v1], labels[v3]))
+            
+            if canonical_key is None or key < canonical_key:
+                canonical_double_triangle, canonical_key = double_triangle, key
+                
+        return canonical_double_triangle
+    
+# =============================================================================
+
+    def double_triangle_certificate(self, double_triangle):
+        '''
+        Returns a certificate of self with the double_triangle marked. Two double triangles of self have the same certificate if and only if an automorphism of self maps one to the other, as far as a DTR is concerned (v0 to v0, v2 to v2, and {v1, v3} to {v1, v3}).
+        '''
+        
+        v0, v1, v2, v3 = double_triangle
+        
+        partition = [[v0], [v2], [v1, v3]]
+        
+        other_vertices = [v for v in self if v not in double_triangle]
+        
+        if other_vertices: partition.append(other_vertices)
+        
+        return canonical_certificate(self, partition = partition)
+    
+# =============================================================================
+
+    def is_canonical_expansion(self, child, e1, e2):
+        '''
+        Returns True if child, the DTE of self at e1 and e2, is the canonical expansion of self, and False otherwise. That is, if the canonical double triangle of child (see child.canonical_double_triangle) is equivalent, under the automorphisms of child, to a double triangle created by the DTE, whose reduction gives back self.
+        
+        This is the acceptance test of McKay's canonical construction path, with double_triangle_reduction as the inverse of double_triangle_expansion. Note that children whose only double triangles are part of triple triangles are never canonical expansions.
+        '''
+        
+        canonical_double_triangle = child.canonical_double_triangle()
+        
+        if canonical_double_triangle is None: return False
+        
+        new_vertex = set(child).difference(self).pop()
+        
+        # The DTE creates the double triangles (c, a, new_vertex, b), where (a, b) is one of the edges and c an end of the other edge adjacent to a and b. Either edge can be the triangle edge.
+        created_double_triangles = []
+        
+        for (a, b), other_edge in [(e1, e2), (e2, e1)]:
+            for c in other_edge:
+                if c not in (a, b) and child.has_edge(c, a) and child.has_edge(c, b):
+                    created_double_triangles.append((c, a, new_vertex, b))
+                    
+        v0, v1, v2, v3 = canonical_double_triangle
+        
+        for c, a, _, b in created_double_triangles:
+            if (c, new_vertex) == (v0, v2) and set([a, b]) == set([v1, v3]): return True
+            
+        canonical_certificate = child.double_triangle_certificate(canonical_double_triangle)
+        
+        for double_triangle in created_double_triangles:
+            if child.double_triangle_certificate(double_triangle) == canonical_certificate: return True
+            
+        return False
+    
 # =============================================================================
 
     def ancestor(self, no_triple_triangles = True):
         '''
         Iteratively reduces all double triangles that are not triple triangles until unable to do so. For a K5-descendant, this should return K5.
         
+        The double triangles are found from a worklist of candidate common edges, which is updated locally after each reduction, so that reducing a graph of order n takes O(n) edge checks (see self.reductions_iterator).
+        
         Options:
             no_triple_triangles -   bool -  Not Implemented Yet! Default: True. If False, reduces all double triangles regardless if they are part of triple triangles. Note that reducing a triple triangle creates multiple edges, which may not  be enabled by default. To get the right graph, call self.allow_multiple_edges(1) first before self.ancestor(options).
         '''
         
         graph = self.copy(immutable = False)
         
-        while True:
-            try:
-                double_triangle = graph.double_triangle_iterator(not_triple_triangle = no_triple_triangles).next()
-                graph.double_triangle_reduction(double_triangle, new_graph = False)
-                
-            except StopIteration:
-                break
+        for _ in graph.reductions_iterator(no_triple_triangles = no_triple_triangles, new_graph = False): pass
         
         return graph
 
+# =============================================================================
+
+    def reductions_iterator(self, no_triple_triangles = True, new_graph = True):
+        '''
+        Returns an iterator over the successive reductions of self towards its ancestor (see self.ancestor). A double triangle is reduced before each step, and the reduced graph is yielded. The same graph object is yielded at every step, modified in place, so it should be copied if it is to be kept.
+        
+        Options:
+            no_triple_triangles -   bool -  Default: True. As in self.ancestor.
+            
+            new_graph -             bool -  Default: True. If True, a copy of self is reduced, and self is unchanged.
+        '''
+        
+        if new_graph: graph = self.copy(immutable = False)
+        else: graph = self
+        
+        # The worklist holds the edges that may be the common edge of a double triangle. A DTR only changes the edges at its vertices and at the fourth neighbor of v2, so only the edges at these vertices are put back on the worklist, instead of searching the whole graph again.
+        adjacency = ct.adjacency(graph)
+        
+        worklist = collections.deque(ct.edges_at(list(adjacency), adjacency))
+        
+        while worklist:
+            v0, v2 = worklist.popleft()
+            
+            # The edge may have been removed by an earlier reduction.
+            if v0 not in adjacency or v2 not in adjacency[v0]: continue
+            
+            double_triangle = ct.edge_double_triangle(v0, v2, adjacency, not_triple_triangle = no_triple_triangles)
+            
+            if double_triangle is None: continue
+            
+            changed_vertices = set(double_triangle).union(adjacency[v2])
+            changed_vertices.discard(v2)
+            
+            graph.double_triangle_reduction(double_triangle, new_graph = False)
+            
+            del adjacency[v2]
+            
+            for v in changed_vertices:
+                adjacency[v] = ct.neighbors(graph, v)
+                
+            worklist.extend(ct.edges_at(changed_vertices, adjacency))
+            
+            yield graph
+
 # =============================================================================
 
 
@@ -286,7 +529,7 @@ class DTEGraph(eGraph):
         if e1 is None and e2 is None:
             return self.is_isomorphic(cg.triangle_and_edge())
         
-        condition=cg.triangle_and_edge(e1,e2).is_subgraph(self, induced=False)
+        condition=ct.is_triangle_and_edge(self, e1, e2)
         
         if condition: return True
         
@@ -300,6 +543,28 @@ class DTEGraph(eGraph):
         else:
             return False
         
+# =============================================================================        
+        
+    def triangles(self):
+        '''
+        Returns the frozenset of the triangles of self, each as a frozenset of vertices. 
+        
+        It is stored in self.counts, and updated locally by self.crossing_into_vertex and self.double_triangle_reduction.
+        '''
+        
+        return self.count('triangles', ct.triangles_set)
+    
+# =============================================================================        
+        
+    def triangle_types(self):
+        '''
+        Returns the list of (triangle_and_edge, triangle_type, edge_pair) tuples of self, as calculated by common.triangles.triangle_types in a single pass over the triangles of self.
+        
+        The list is stored in self.counts, and updated locally by self.crossing_into_vertex and self.double_triangle_reduction.
+        '''
+        
+        return self.count('triangle_types', ct.triangle_types)
+    
 # =============================================================================        
         
     def triangle_and_edge_iterator(self, return_edges = False, ignore_multiple_edges = True):
@@ -307,24 +572,19 @@ class DTEGraph(eGraph):
         If return_edges=True, this returns an iterator of tuples of the edges. If False, which is the default, it returns an iterator over the vertex sets of the subgraphs.
         
         The vertex sets are ordered. e1=[0,2] (triangle_edge), e2=[1,3] (path_edge)
-        '''
-        
-        G=self.ecopy()
         
-        G.allow_multiple_edges(False) # This is done because self.subgraph_search_iterator does not yet work with multigraphs.
+        The triangle and edges are enumerated directly from the adjacency of self, each once (see common.triangles.triangle_and_edge_iterator).
+        '''
         
-        if ignore_multiple_edges or G == self:
-            pass
-        else:
-            raise ce.UnsupportedOption('Multiple edges must be ignored for this iterator to work, due to a multiple edges not being implemented in self.subgraph_search_iterator.')
+        if not ignore_multiple_edges and self.has_multiple_edges():
+            raise UnsupportedOption('Multiple edges must be ignored for this iterator to work.')
             
-        iterator=self.subgraph_search_iterator(cg.triangle_and_edge())
-        while True:
+        for triangle_and_edge in ct.triangle_and_edge_iterator(self):
             if return_edges:
-                yield get_edge_triangle_and_edge(iterator.next())
+                yield get_edge_triangle_and_edge(triangle_and_edge)
             
             else:
-                yield iterator.next()
+                yield triangle_and_edge
 
     #@property
     def expanded(self):
@@ -362,6 +622,99 @@ class DTEGraph(eGraph):
 #   Standalone functions
 # =============================================================================
 
+def edge_pair_key(e1, e2):
+    '''
+    Returns a hashable key of the edge pair e1, e2 that disregards the order of the edges and of their vertices.
+    '''
+    
+    return tuple(sorted([tuple(sorted(e1)), tuple(sorted(e2))]))
+
+
+def ancestor_certificates(graphs, workers = None, memo = None, no_triple_triangles = True):
+    '''
+    Returns the list of the canonical certificates of the ancestors (see DTEGraph.ancestor) of graphs, an iterable (for instance, a generator reading a graph6 file) of any sage Graphs. For instance, the K5-descendants among graphs are the ones whose ancestor certificate is canonical_certificate(graphs.CompleteGraph(5)).
+    
+    The ancestor of a graph only depends on its isomorphism class, so the certificates of the intermediate reduced graphs are memoized: once a reduced graph is isomorphic to one seen before, its ancestor certificate is looked up instead of reducing it further.
+    
+    Options:
+        workers -               int -   Default: None. If greater than 1, the graphs are reduced in a pool of this many processes, each with its own memo.
+        
+        memo -                  dict -  Default: None. The certificate to ancestor certificate dictionary used, and updated, when workers is not greater than 1. If None, a new one is used.
+        
+        no_triple_triangles -   bool -  Default: True. As in DTEGraph.ancestor.
+    '''
+    
+    # The graphs are needed as a list to be sent to the pool, and are read only once.
+    graphs = list(graphs)
+    
+    if workers is None or workers <= 1 or len(graphs) < 2:
+        if memo is None: memo = dict()
+        
+        return [memoized_ancestor_certificate(graph, memo, no_triple_triangles = no_triple_triangles) for graph in graphs]
+    
+    import multiprocessing
+    
+    tasks = [(graph.vertices(), graph.edges(labels = False), graph.allows_multiple_edges(), graph.allows_loops(), no_triple_triangles) for graph in graphs]
+    
+    pool = multiprocessing.Pool(workers)
+    
+    try:
+        # Consecutive graphs are sent to the same worker, as they often share reduction paths (for instance, in a graph6 dump sorted by order).
+        return pool.map(edges_ancestor_certificate, tasks, chunksize = max(1, len(tasks) // (4*workers)))
+    
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def memoized_ancestor_certificate(graph, memo, no_triple_triangles = True):
+    '''
+    Returns the canonical certificate of the ancestor of graph, reducing it until one of its reductions has its certificate in memo, a certificate to ancestor certificate dictionary. The certificates of graph and of its reductions are added to memo.
+    '''
+    
+    if not isinstance(graph, DTEGraph):
+        graph = DTEGraph(graph)
+    
+    certificate = canonical_certificate(graph)
+    
+    if certificate in memo: return memo[certificate]
+    
+    reduced_certificates = [certificate]
+    
+    for reduced_graph in graph.reductions_iterator(no_triple_triangles = no_triple_triangles):
+        certificate = canonical_certificate(reduced_graph)
+        
+        if certificate in memo:
+            ancestor_certificate = memo[certificate]
+            break
+        
+        reduced_certificates.append(certificate)
+        
+    else:
+        ancestor_certificate = certificate
+        
+    for certificate in reduced_certificates:
+        memo[certificate] = ancestor_certificate
+        
+    return ancestor_certificate
+
+
+# The memo of ancestor certificates of each worker process of ancestor_certificates.
+worker_ancestor_memo = dict()
+
+
+def edges_ancestor_certificate(task):
+    '''
+    Returns the ancestor certificate of the graph of task, a (vertices, edges, multiedges, loops, no_triple_triangles) tuple. This is run by the worker processes of ancestor_certificates.
+    '''
+    
+    vertices, edges, multiedges, loops, no_triple_triangles = task
+    
+    graph = DTEGraph([vertices, edges], format = 'vertices_and_edges', multiedges = multiedges, loops = loops)
+    
+    return memoized_ancestor_certificate(graph, worker_ancestor_memo, no_triple_triangles = no_triple_triangles)
+
+
 def get_edge_triangle_and_edge(vertices):
     e1=(vertices[0],vertices[2])    # opposite triangle edge
     e2=(vertices[1],vertices[3])    # edge
@@ -34,6 +34,7 @@ except ImportError:
 #import common.functions as cf
 
 from common.functions import classproperty
+from common import triangles as ct
 from common.exceptions import InvalidHash, NoneReturned
 #from common.exceptions import NotSubgraph, Underdefined
 #from common.exceptions import UnsupportedOption
@@ -55,16 +56,33 @@ class eGraph(Graph):
     # extra_attributes are attributes that need to be copied in addition to the Graph object, for a full copy.
     @classproperty
     def extra_attributes(cls):
-        return {'counts': dict(), 'hashes': dict(), 'count_functions': dict()}
+        return {'counts': dict(), 'hashes': dict(), 'count_functions': dict(), 'modified_count': 0}
+    
+    # preset_count_functions are the count functions set on every graph of the class, unless use_preset_count_functions is False. Subclasses extend them.
+    @classproperty
+    def preset_count_functions(cls):
+        return {
+            'order': lambda G: G.order(),
+            'triangles_count': triangles_count,
+            'level': lambda G: G.order()-G.triangles_count(),
+            'chromatic_number': lambda G: G.chromatic_number(),
+            'connectivity': lambda G: G.connectivity(),
+            'degree_sequence': lambda G: tuple(G.degree_sequence()),
+            'canonical_certificate': calculate_canonical_certificate,
+            'automorphism_group': automorphism_group,
+            }
     
     def __init__(self, data=None, use_preset_count_functions=True, **kwargs): #immutable = True
         '''
         Can be initialized the same way as a sage Graph object.
         '''
         
+        # self.modified_count is increased by every modification of self (see self.has_been_modified). It needs to exist before super().__init__, which adds the vertices and edges of data.
+        self.modified_count = 0
+        
         super(eGraph, self).__init__(data, **kwargs)
         
-        # The self.counts dict contains precalculated information about Graph, and self.hashes will contain the hashes of the graph when those values were calculated. A value will be recalculated if current hash is different from when the value was calculated.
+        # The self.counts dict contains precalculated information about Graph, and self.hashes will contain the self.modified_count of the graph when those values were calculated. A value will be recalculated if self has been modified since the value was calculated.
         self.counts = dict()
         self.hashes = dict()
         
@@ -72,13 +90,7 @@ class eGraph(Graph):
         self.count_functions = dict()
         
         if use_preset_count_functions:
-            self.count_functions.update({
-                'order': lambda G: G.order(),
-                'triangles_count': triangles_count,
-                'level': lambda G: G.order()-G.triangles_count(),
-                'chromatic_number': lambda G: G.chromatic_number(),
-                'connectivity': lambda G: G.connectivity(),
-            })
+            self.count_functions.update(self.preset_count_functions)
                 
         #if immutable: self = self.immutable_copy()
         
@@ -105,10 +117,31 @@ class eGraph(Graph):
 
     def hash(self):
         '''
-        Returns the hash of an immutable copy of self.
+        Returns the hash of an immutable copy of self. If self is immutable, no copy is made.
         '''
         
+        if self.is_immutable(): return hash(self)
+        
         return hash(self.immutable_copy())
+    
+# =============================================================================  
+
+    def is_immutable(self):
+        '''
+        Returns True if self is immutable, and False otherwise.
+        '''
+        
+        return getattr(self, '_immutable', False)
+    
+# =============================================================================  
+
+    def has_been_modified(self):
+        '''
+        This is called whenever self is modified. It adds +1 to self.modified_count, which invalidates the counts calculated for earlier versions of self.
+        '''
+        
+        self.modified_count += 1
+        return
 
     
 # =============================================================================
@@ -134,12 +167,10 @@ class eGraph(Graph):
         
     def set_count(self, count_name, count_value = None, count_function = None):
         '''
-        Adds or changes self.counts[count_name], count_name expected to be a string, and adds count_name to self.hashes.
+        Adds or changes self.counts[count_name], count_name expected to be a string, and records the current self.modified_count in self.hashes.
         '''
         
-        current_hash = self.hash()
-        
-        self.hashes[count_name] = current_hash
+        self.hashes[count_name] = self.modified_count
         
         if count_value is None and count_name in self.counts: 
             pass
@@ -156,18 +187,18 @@ class eGraph(Graph):
     
     def check_count(self, count_name):
         '''
-        This checks if count_name is valid.
+        This checks if count_name is valid. Counts of immutable graphs are always valid once calculated, so only counts of mutable graphs are checked against self.modified_count.
         '''
         
-        current_hash = self.hash()
-        
         if not count_name in self.counts:
             raise IndexError('count_name '+str(count_name)+' has not been calculated yet.')
             
         elif self.counts[count_name] is None:
             raise NoneReturned('count_name ' + str(count_name) + ' has not been calculated yet.')
         
-        if current_hash != self.hashes[count_name]:
+        if self.is_immutable(): return
+        
+        if self.modified_count != self.hashes.get(count_name):
             raise InvalidHash('The count has not been verified for the current version of the graph.')
     
 # =============================================================================    
@@ -193,6 +224,20 @@ class eGraph(Graph):
         self.set_count(count_name, count_value = count_function(self), count_function = count_function) # Will be reset after every calculation. Desired?
         return self.counts[count_name]
 
+# =============================================================================
+
+    def cached_count(self, count_name):
+        '''
+        Returns self.counts[count_name] if it is valid for the current version of self, and None otherwise. Unlike self.count, it never calculates the count.
+        '''
+        
+        try:
+            self.check_count(count_name)
+            return self.counts[count_name]
+        
+        except (InvalidHash, IndexError, NoneReturned):
+            return None
+
 # =============================================================================
 
     def list_counts(self, count_names = list()):
@@ -358,6 +403,43 @@ class eGraph(Graph):
 
 # =============================================================================
 # Graph isomorphism
+# =============================================================================
+
+    def canonical_certificate(self, partition = None):
+        '''
+        Returns the canonical certificate of self (see canonical_certificate). Without partition, it is cached as the count 'canonical_certificate'.
+        '''
+        
+        if partition is not None: return calculate_canonical_certificate(self, partition = partition)
+        
+        count_function = calculate_canonical_certificate
+        
+        return self.count('canonical_certificate', count_function)
+    
+# =============================================================================
+
+    def automorphism_group(self, *pargs, **kwargs):
+        '''
+        Same as Graph.automorphism_group. Without arguments, the group is cached as the count 'automorphism_group'.
+        '''
+        
+        if pargs or kwargs: return super(eGraph, self).automorphism_group(*pargs, **kwargs)
+        
+        count_function = automorphism_group
+        
+        return self.count('automorphism_group', count_function)
+    
+# =============================================================================
+
+    def is_isomorphic(self, other, *pargs, **kwargs):
+        '''
+        Same as Graph.is_isomorphic. Without other arguments, if other is an eGraph, the cached canonical certificates of self and other are compared instead.
+        '''
+        
+        if pargs or kwargs or not isinstance(other, eGraph): return super(eGraph, self).is_isomorphic(other, *pargs, **kwargs)
+        
+        return self.canonical_certificate() == other.canonical_certificate()
+    
 # =============================================================================
     
     def has_isomorphic_subgraph(self, graph):
@@ -374,6 +456,36 @@ class eGraph(Graph):
             return True
 
     
+# =============================================================================
+#   Modification tracking
+# =============================================================================
+
+# The Graph methods that modify a graph. eGraph overrides each of them to also call self.has_been_modified. eGraph.identify_vertices, eGraph.subdivide_edge and eGraph.crossing_into_vertex are built on these, so they are tracked as well.
+graph_modifiers = ['add_edge', 'add_edges', 'delete_edge', 'delete_edges', 'delete_multiedge', 'add_vertex', 'add_vertices', 'delete_vertex', 'delete_vertices', 'merge_vertices', 'relabel', 'allow_multiple_edges', 'allow_loops', 'clear']
+
+
+def graph_modifier(method_name):
+    '''
+    Returns a method that calls Graph.<method_name> and then self.has_been_modified().
+    '''
+    
+    graph_method = getattr(Graph, method_name)
+    
+    def modifier(self, *pargs, **kwargs):
+        output = graph_method(self, *pargs, **kwargs)
+        self.has_been_modified()
+        return output
+    
+    modifier.__name__ = method_name
+    modifier.__doc__ = graph_method.__doc__
+    
+    return modifier
+
+
+for method_name in graph_modifiers:
+    setattr(eGraph, method_name, graph_modifier(method_name))
+    
+    
 # =============================================================================
 #   Standalone functions
 # =============================================================================
@@ -383,36 +495,120 @@ def eGraph_copy(graph, graph_class = eGraph, immutable = False):
     '''
     Returns an eGraph copy of graph.
     
+    If both graph and the copy are immutable, the underlying graph is not copied: graph itself is returned if it is already of class graph_class, and otherwise a view sharing its backend and extra_attributes is returned (see eGraph_view).
+    
     Options:
         graph_class -   class -     The desired class of the new graph.  
         immutable -     bool -      Whether to return an immutable eGraph copy.
     '''
     
-    # Convert graph into the specified class, and make it immutable if specified.
-    G = graph_class(graph).copy(immutable = immutable) 
+    if immutable and getattr(graph, '_immutable', False):
+        
+        if type(graph) is graph_class: return graph
+        
+        return eGraph_view(graph, graph_class = graph_class)
+    
+    # Convert graph into the specified class, and make it immutable if specified. This copies graph only once.
+    G = graph_class(graph, immutable = immutable) 
     
     for attr in G.extra_attributes:       
         try:
-            setattr(G, attr, getattr(graph, attr))
+            value = getattr(graph, attr)
+            
+            # The dicts are copied rather than shared, so that modifying either graph does not change the counts of the other.
+            if isinstance(value, dict): value = copy.copy(value)
+            
+            setattr(G, attr, value)
         
         except AttributeError:
             setattr(G, attr, G.extra_attributes[attr])
+            
+    # Counts of immutable graphs are not validated, so the counts calculated for earlier versions of a mutable graph are dropped.
+    if immutable and not getattr(graph, '_immutable', False):
+        for count_name in list(G.counts):
+            if G.hashes.get(count_name) != G.modified_count:
+                del G.counts[count_name]
     
     return G
 
 # =============================================================================
 
+def eGraph_view(graph, graph_class = eGraph):
+    '''
+    Returns an immutable graph of class graph_class that shares the backend and the extra_attributes of the immutable graph, without copying either. The extra_attributes missing from graph are set to their defaults.
+    
+    Since neither graph can be modified, their counts remain valid for both, so sharing them is safe. The count functions are not shared: the view has the preset count functions of graph_class (see eGraph.preset_count_functions), and the other count functions of graph.
+    '''
+    
+    if not getattr(graph, '_immutable', False):
+        raise ValueError('graph must be immutable to be viewed as a '+str(graph_class.__name__)+'.')
+    
+    G = graph_class.__new__(graph_class)
+    G.__dict__.update(graph.__dict__)
+    
+    for attr, default_value in G.extra_attributes.items():
+        if attr not in G.__dict__: setattr(G, attr, default_value)
+        
+    G.count_functions = dict(getattr(graph, 'count_functions', dict()))
+    G.count_functions.update(graph_class.preset_count_functions)
+        
+    return G
+
+# =============================================================================
+
 def triangles_count(G): 
     '''
-    This is a triangles_count that works for graphs with multiple edges, which relies on the Matrix Tree Theorem corollary that "trace(G.adjacency_matrix()**3/6)=triangles count". Note that it is quite slow.
+    This is a triangles_count that works for graphs with multiple edges, which are counted with multiplicity, as in "trace(G.adjacency_matrix()**3/6)=triangles count". For multigraphs, the count is done on the edges of G with common.triangles.multigraph_triangles_count, rather than with the dense adjacency matrix.
     '''
     
     try:
         return super(eGraph, G).triangles_count()
     
     except ValueError:
-        return (G.adjacency_matrix()**3/6).trace()
+        return ct.multigraph_triangles_count(G)
+
+# =============================================================================
+
+def canonical_certificate(G, partition = None):
+    '''
+    Returns a hashable certificate of the isomorphism class of G: two graphs have equal certificates if and only if they are isomorphic. Edge labels are ignored, as in G.is_isomorphic.
+
+    The certificate is the order of G together with the sorted edge list of G.canonical_label(), so multiple edges and loops are kept. If G is an eGraph and partition is None, the certificate is cached in G.counts (see eGraph.canonical_certificate).
     
+    Options:
+        partition -     list -  Default: None. An ordered partition of the vertices of G. If given, two graphs have equal certificates if and only if there is an isomorphism between them mapping the i-th cell of one partition to the i-th cell of the other. The sizes of the cells are part of the certificate, so certificates with and without a partition never collide.
+    '''
+    
+    if partition is None and isinstance(G, eGraph): return G.canonical_certificate()
+    
+    return calculate_canonical_certificate(G, partition = partition)
+
+# =============================================================================
+
+def calculate_canonical_certificate(G, partition = None):
+    '''
+    Calculates the canonical certificate of G, without looking up or filling the cache of eGraphs. See canonical_certificate.
+    '''
+
+    canonical_graph = G.canonical_label(partition = partition)
+
+    certificate = (canonical_graph.order(), tuple(sorted(canonical_graph.edges(labels = False))))
+
+    # The canonical labels are assigned cell by cell, so the sizes of the cells are needed to tell where each cell ends.
+    if partition is not None:
+        certificate += (tuple(len(cell) for cell in partition),)
+
+    return certificate
+
+# =============================================================================
+
+def automorphism_group(G):
+    '''
+    Calculates the automorphism group of G with Graph.automorphism_group, without looking up or filling the cache of eGraphs.
+    '''
+    
+    return Graph.automorphism_group(G)
+
     
 # =============================================================================
 #     
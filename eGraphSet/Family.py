@@ -28,12 +28,19 @@ Created on Sun Jun 24 08:50:25 2018
 #import pickle
 #import copy
 #import time
+import multiprocessing
+
+import numpy as np
 
 from eGraph import DTEGraph, eGraph
 from eGraphSet import eGraphSet
+from FamilyTree import FamilyTree
 #from extended.eGraphIndexedSet import eGraphIndexedSet
 #import ..common.graphs as cg
-#import ..common.functions as cf
+from common import functions as cf
+from common import storage as cst
+from common import treeplot as ctp
+from common.exceptions import UnsupportedOption, Underdefined
 
 # =============================================================================
 #
@@ -59,12 +66,15 @@ class Family(eGraphSet):
         
         super(Family, self).__init__(*pargs, **kwargs)
         
-        self.tree=eGraph.eGraph(name="Family Tree", multiedges=False, loops=False, vertex_labels=True).to_directed() 
+        # The tree is indexed by the positions of the members in self (see FamilyTree).
+        self.tree = FamilyTree()
         
         self.expanded = dict()
         
         self._graph_class = DTEGraph.DTEGraph
         
+        self.reset_DTR_parents()
+        
         self.has_been_modified()
 
 # =============================================================================
@@ -89,13 +99,77 @@ class Family(eGraphSet):
     
 # =============================================================================
 
-    def plot_tree(self, conditions = dict(), layout = 'acyclic', **kwargs):
+    def plot_tree(self, conditions = dict(), layout = 'layered', filename = None, aggregate = False, **kwargs):
         '''
         Plot the family tree, removing any vertices (from the plotted tree; the vertices remain in the full tree) which do not satisfy the specified conditions.
+        
+        Options:
+            layout -    str -   Default: 'layered'. If 'layered', the tree is drawn with one layer per order, sorted by level, and bundled edges, directly from the arrays of self.tree (see common.treeplot.render_tree, to which kwargs is passed). Otherwise, the tree is converted to a sage DiGraph (see self.tree_digraph) and plotted with this sage layout (for instance, 'acyclic'), which is only practical for small families.
+            filename -  str -   Default: None. With the 'layered' layout, the file the plot is saved to: an SVG file is streamed, and other formats are saved by matplotlib. If None, the matplotlib Figure is returned.
+            aggregate - bool -  Default: False. With the 'layered' layout, if True, the members of each order and level are drawn as one node, sized by their number (level of detail for large families).
         '''
         
-        graphs = set(self.member_iterator(conditions))
-        return self.tree.subgraph(graphs).plot(layout = layout, **kwargs)
+        if layout != 'layered':
+            return self.tree_digraph(conditions).plot(layout = layout, **kwargs)
+        
+        if conditions:
+            indexes = np.array(sorted(self.index(graph) for graph in self.member_iterator(conditions)), dtype = np.int64)
+            
+        else:
+            indexes = np.arange(len(self), dtype = np.int64)
+            
+        orders = np.array([self.member_count(self[int(index)], 'order') for index in indexes], dtype = np.int64)
+        levels = np.array([self.member_count(self[int(index)], 'level') for index in indexes], dtype = np.int64)
+        
+        sources, targets = self.tree.edges()
+        
+        kept = np.isin(sources, indexes) & np.isin(targets, indexes)
+        
+        # The edges are given by the positions of their vertices in indexes.
+        sources = np.searchsorted(indexes, sources[kept])
+        targets = np.searchsorted(indexes, targets[kept])
+        
+        return ctp.render_tree(filename, orders, levels, sources, targets, aggregate = aggregate, **kwargs)
+    
+    def member_count(self, graph, count_name):
+        '''
+        Returns graph.count(count_name), as recorded by the indexes of self if it is indexed.
+        '''
+        
+        invariants = self.member_invariants.get(graph, dict())
+        
+        if count_name in invariants: return invariants[count_name]
+        
+        return graph.count(count_name)
+    
+# =============================================================================
+
+    def tree_digraph(self, conditions = dict()):
+        '''
+        Returns the family tree as a sage DiGraph whose vertices are the members of self, restricted to the members which satisfy the conditions, if specified. The DiGraph is built from self.tree on every call.
+        '''
+        
+        if conditions:
+            vertices = [self.index(graph) for graph in self.member_iterator(conditions)]
+            
+        else:
+            vertices = None
+            
+        return self.tree.to_digraph(vertices, labels = self)
+    
+    def tree_children(self, descendant):
+        '''
+        Returns the list of the children of descendant in the family tree.
+        '''
+        
+        return [self[index] for index in self.tree.children(self.index(descendant))]
+    
+    def tree_parents(self, descendant):
+        '''
+        Returns the list of the parents of descendant in the family tree.
+        '''
+        
+        return [self[index] for index in self.tree.parents(self.index(descendant))]
         
         
     
@@ -123,25 +197,64 @@ class Family(eGraphSet):
         
         if duplicate_graph is None: 
             #child = self[-1] # The child will be the most recent addition to self. This is a little hacky.
-            self.tree.add_vertex(child) 
+            self.tree.add_vertex(self.index(child))
             self.set_expanded(child, False)
             child.family = self
         
         else: child = duplicate_graph
             
-        if parent is not None: self.tree.add_edge(parent, child)
+        if parent is not None: self.tree.add_edge(self.index(parent), self.index(child))
             
         self.has_been_modified()  
             
         return duplicate_graph
     
 
+# =============================================================================
+
+    def add_children(self, graphs, parent = None, no_adding = False, certificates = None, **kwargs):
+        '''
+        Same as self.add_child, for a batch of graphs: adds the graphs to self and to self.tree in one pass (see eGraphSet.add_graphs, to which kwargs is passed), and returns the list of their representatives in self.
+        
+        Options:
+            parent -    eGraph -    Default: None. If not None, adds an edge to self.tree between parent and the representative of every graph.
+            
+            no_adding - bool -      If True, do not add the children to the family.
+            
+            certificates -  list -  The canonical certificates of graphs, if already known. If None, they are calculated.
+        '''
+        
+        children = [eGraph.eGraph_copy(graph, graph_class = self.graph_class, immutable = True) for graph in graphs]
+        
+        first_new_index = len(self)
+        
+        representatives = self.add_graphs(children, no_adding = no_adding, certificates = certificates, **kwargs)
+        
+        if no_adding: return representatives
+        
+        for index in range(first_new_index, len(self)):
+            child = self[index]
+            
+            self.tree.add_vertex(index)
+            self.expanded[child] = False
+            child.family = self
+            
+        if parent is not None:
+            parent_index = self.index(parent)
+            
+            for child in representatives:
+                self.tree.add_edge(parent_index, self.index(child))
+                
+        self.has_been_modified()
+        
+        return representatives
+    
 # =============================================================================
     
 
-    def children_iterator(self, add_new_children = True, only_nonisomorphic = True, yield_preexisting_descendants = False, conditions = dict(), **kwargs):
+    def children_iterator(self, add_new_children = True, only_nonisomorphic = True, yield_preexisting_descendants = False, conditions = dict(), workers = None, **kwargs):
         '''
-        Returns an iterator over the children of descendants. The descendants expanded are the ones that fit the conditions. kwargs is passed to each graph.children_iterator and to self.set_expanded.
+        Returns an iterator over the children of descendants. The descendants expanded are the ones that fit the conditions. kwargs is passed to each graph.children_iterator.
         
         Note that, unless yield_preexisting_descendants = True, only new children will be yielded.
         
@@ -153,8 +266,16 @@ class Family(eGraphSet):
             yield_preexisting_descendants -    bool -  Whether to output already existing descendants.
             
             conditions -    dict -  A count_name to count_value dictionary.
+            
+            workers -       int -   Default: None. If greater than 1, the descendants are expanded in a pool of this many processes. See self.parallel_children_iterator.
         '''
         
+        if workers is not None and workers > 1:
+            for child in self.parallel_children_iterator(workers = workers, add_new_children = add_new_children, only_nonisomorphic = only_nonisomorphic, yield_preexisting_descendants = yield_preexisting_descendants, conditions = conditions, **kwargs):
+                yield child
+                
+            return
+        
         # already_output_graphs contains references to all the graphs that have been output by this function.
         #   This is so children are not output more than once.
         
@@ -165,37 +286,161 @@ class Family(eGraphSet):
             # Skip the descendant if it has already been expanded.
             if self.expanded[descendant]: continue
             
-            # The children eGraphSet should speed up the isomorphism check process, especially if add_new_children = False.
-            children = eGraphSet()
-            
             # These lines is to yield preexisting children.
             if yield_preexisting_descendants and descendant not in already_output_graphs:
                 yield descendant
                 already_output_graphs.add(descendant)
             
- 
-            for child in descendant.children_iterator(**kwargs):
+            # The children are added in one batch, which is deduplicated before being looked up in self (see self.add_children).
+            first_new_index = len(self)
+            
+            representatives = self.add_children(descendant.children_iterator(**kwargs), parent = descendant, require_nonisomorphic = only_nonisomorphic, no_adding = not add_new_children)
+            
+            if add_new_children:
+                new_children = [self[index] for index in range(first_new_index, len(self))]
                 
-                # Check if child is in children of current descendant.
-                duplicate_graph = children.add_graph(graph=child, require_nonisomorphic = only_nonisomorphic) 
+            else:
+                new_children = []
                 
-                # Check if child is in self.
-                if duplicate_graph is None:
-                    duplicate_graph = self.add_child(child, parent=descendant, require_nonisomorphic = only_nonisomorphic, no_adding = not add_new_children)
-                    
+                for child in representatives:
+                    if child not in self and not any(child is new_child for new_child in new_children): new_children.append(child)
+            
+            for child in new_children:
                 
-                if duplicate_graph is None:
-                    # This means that child is a new graph.
-                    
-                    yield child
-                    already_output_graphs.add(child.ecopy(immutable=True))                   
+                yield child
                 
-                else: child = duplicate_graph
+                # These are only needed to recognize preexisting descendants.
+                if yield_preexisting_descendants: already_output_graphs.add(child)
     
             # All triangles in descendant have been expanded, so we set self.expanded[descendant] accordingly.    
             if add_new_children:
-                self.set_expanded(descendant, **kwargs)
+                self.set_expanded(descendant)
+        
+# =============================================================================
+
+    def parallel_children_iterator(self, workers = None, add_new_children = True, only_nonisomorphic = True, yield_preexisting_descendants = False, conditions = dict(), **kwargs):
+        '''
+        Same as self.children_iterator, except that the descendants are expanded in a pool of worker processes. kwargs is passed to each graph.children_iterator, serialized with dill, so that it can hold lambda functions such as edge_pair_provider. Raises an UnsupportedOption exception if dill cannot serialize kwargs.
+        
+        Each worker expands one descendant, and returns the canonical certificates and edge lists of its nonisomorphic children (see expand_descendant). The children are then added to self in this process, in the order of the descendants in self, so the resulting family does not depend on the number of workers.
+        
+        Options:
+            workers -   int -   Default: None. The number of worker processes. If None, multiprocessing.cpu_count() is used.
+        '''
+        
+        import dill # The options are serialized with dill, since they often hold lambda functions (for instance, edge_pair_provider), which cannot be pickled.
+        
+        # The options are serialized once, so that unserializable options are rejected before any descendant is expanded.
+        try:
+            serialized_kwargs = dill.dumps(kwargs)
+            
+        except Exception as exc:
+            raise UnsupportedOption('The children_iterator options must be serializable by dill to be sent to the worker processes: '+str(exc))
+        
+        # The descendants are fixed before expanding, since children added to self are not expanded in the same pass.
+        descendants = [descendant for descendant in self.member_iterator(conditions) if not self.expanded[descendant]]
+        
+        tasks = ((self.graph_class, descendant.edges(labels = False), descendant.allows_multiple_edges(), descendant.allows_loops(), only_nonisomorphic, serialized_kwargs) for descendant in descendants)
+        
+        already_output_graphs = set()
+        
+        pool = multiprocessing.Pool(workers)
+        
+        try:
+            for index, children in enumerate(pool.imap(expand_descendant, tasks)):
+                
+                descendant = descendants[index]
+                
+                if yield_preexisting_descendants and descendant not in already_output_graphs:
+                    yield descendant
+                    already_output_graphs.add(descendant)
+                    
+                for certificate, edges, multiedges, loops in children:
+                    
+                    child = self.graph_class(edges, multiedges = multiedges, loops = loops, immutable = True)
+                    
+                    duplicate_graph = self.add_child(child, parent = descendant, require_nonisomorphic = only_nonisomorphic, no_adding = not add_new_children, certificate = certificate)
+                    
+                    if duplicate_graph is None:
+                        # This means that child is a new graph.
+                        
+                        yield child
+                        
+                        if yield_preexisting_descendants: already_output_graphs.add(child)
+                        
+                if add_new_children:
+                    self.set_expanded(descendant)
+                    
+        finally:
+            pool.terminate()
+            pool.join()
+        
+# =============================================================================
+
+    def storage_metadata(self):
+        '''
+        Returns the metadata saved in the header of the binary eGraphSet format (see eGraphSet.storage_metadata).
+        '''
+        
+        metadata = super(Family, self).storage_metadata()
+        
+        metadata['graph_class'] = self.graph_class.__name__
         
+        return metadata
+    
+# =============================================================================
+
+    def storage_record(self, descendant):
+        '''
+        Returns the common.storage.Record of descendant, with its expanded flag and the indexes of its parents in self.tree.
+        '''
+        
+        record = super(Family, self).storage_record(descendant)
+        
+        flags = record.flags
+        
+        if self.expanded.get(descendant): flags |= cst.EXPANDED
+        
+        parents = self.tree.parents(self.index(descendant))
+        
+        return record._replace(flags = flags, parents = parents)
+    
+# =============================================================================
+
+    def load_record(self, record, graph_class, members):
+        '''
+        Adds the descendant of record to self and to self.tree, with its expanded flag and the edges from its parents, and returns it. Parents are members of self before their children, so they are already in members.
+        '''
+        
+        descendant = super(Family, self).load_record(record, graph_class, members)
+        
+        index = self.index(descendant)
+        
+        self.tree.add_vertex(index)
+        self.expanded[descendant] = bool(record.flags & cst.EXPANDED)
+        descendant.family = self
+        
+        for parent in record.parents:
+            self.tree.add_edge(self.index(members[parent]), index)
+            
+        return descendant
+    
+# =============================================================================
+
+    def load_expansion(self, expansion, members):
+        '''
+        Marks the descendant of expansion as expanded, and adds the edges to its children to self.tree.
+        '''
+        
+        descendant = members[expansion.descendant]
+        
+        parent_index = self.index(descendant)
+        
+        for child in expansion.children:
+            self.tree.add_edge(parent_index, self.index(members[child]))
+            
+        self.expanded[descendant] = True
+    
 # =============================================================================
 
     def set_expanded(self, descendant, desired_expanded = True):
@@ -207,44 +452,487 @@ class Family(eGraphSet):
         
         self.has_been_modified()
     
+# =============================================================================
+#   DTR parents
 # =============================================================================
 
+    def DTR_parents_map(self):
+        '''
+        Returns (offsets, parent_indexes), the parents of the members of self by double triangle reduction, as two NumPy int64 arrays: the indexes of the parents of the member of index i are parent_indexes[offsets[i]:offsets[i+1]], in increasing order.
+        
+        Unlike self.tree, which only has the edges of the expansions that generated each descendant, the map has all the distinct parents of each member in self. It is calculated once per member and cached, and only the members added since the last call are reduced (see self.calculate_DTR_parents). Since a DTR decreases the order by exactly 1, a new member of order k can only be a parent of members of order k+1, so the cached entries of the members of order k+1 are recalculated. Removing members resets the cache.
+        '''
+        
+        offsets = self.DTR_parent_offsets
+        cached_count = len(offsets) - 1
+        
+        if cached_count < len(self):
+            new_orders = set(self.member_count(self[i], 'order') for i in range(cached_count, len(self)))
+            
+            stale_indexes = set()
+            
+            for order in new_orders:
+                stale_indexes.update(self.index(member) for member in self.indexed_members('order', order + 1))
+                
+            stale_indexes = set(index for index in stale_indexes if index < cached_count)
+            
+            if stale_indexes:
+                # The map is rebuilt, keeping the entries that are still valid.
+                parents = [self.calculate_DTR_parents(self[i]) if i in stale_indexes else self.DTR_parent_indexes[offsets[i]:offsets[i+1]].tolist() for i in range(0, cached_count)]
+                
+                self.reset_DTR_parents()
+                self.append_DTR_parents(parents)
+                
+            self.append_DTR_parents([self.calculate_DTR_parents(self[i]) for i in range(cached_count, len(self))])
+            
+        return self.DTR_parent_offsets, self.DTR_parent_indexes
+    
+    def append_DTR_parents(self, parents):
+        '''
+        Appends the entries of parents, a list of lists of parent indexes, one per member following the members already in the cache of self.DTR_parents_map, to the cache.
+        '''
+        
+        offsets = self.DTR_parent_offsets
+        
+        new_offsets = offsets[-1] + np.cumsum([len(member_parents) for member_parents in parents], dtype = np.int64)
+        
+        self.DTR_parent_offsets = np.concatenate([offsets, new_offsets])
+        self.DTR_parent_indexes = np.concatenate([self.DTR_parent_indexes, np.array([index for member_parents in parents for index in member_parents], dtype = np.int64)])
+    
+    def calculate_DTR_parents(self, descendant):
+        '''
+        Returns the sorted list of the indexes in self of the distinct parents of descendant, that is of the members of self isomorphic to a DTR of descendant. Reductions of double triangles that are part of triple triangles are not considered, and reductions that are not in self are skipped.
+        '''
+        
+        parent_indexes = set()
+        
+        # Reducing a double triangle only depends on its common edge, given in four orders by double_triangle_iterator.
+        reduced_edges = set()
+        
+        for double_triangle in descendant.double_triangle_iterator():
+            v0, v1, v2, v3 = double_triangle
+            
+            common_edge = frozenset([v0, v2])
+            
+            if common_edge in reduced_edges: continue
+            
+            reduced_edges.add(common_edge)
+            
+            parent = self.contains(descendant.double_triangle_reduction(double_triangle))
+            
+            if parent is not None:
+                parent_indexes.add(self.index(parent))
                 
-    def descendants_iterator(self, conditions = dict(), only_nonisomorphic = True):
+        return sorted(parent_indexes)
+    
+    def DTR_parent_indexes_of(self, descendant):
+        '''
+        Returns the NumPy array of the indexes of the parents of descendant, a member of self (see self.DTR_parents_map).
+        '''
+        
+        offsets, parent_indexes = self.DTR_parents_map()
+        
+        index = self.index(descendant)
+        
+        return parent_indexes[offsets[index]:offsets[index+1]]
+    
+    def DTR_parents(self, descendant):
+        '''
+        Returns the list of the parents of descendant in self (see self.DTR_parents_map).
+        '''
+        
+        return [self[int(index)] for index in self.DTR_parent_indexes_of(descendant)]
+    
+    def DTR_parents_count(self, descendant):
+        '''
+        Returns the number of parents of descendant in self (see self.DTR_parents_map).
         '''
-        This returns an iterable over the elements of self corresponding to the conditions. It will first iterate over elements already calculated, and then, if possible, calculates the next elements.
+        
+        return len(self.DTR_parent_indexes_of(descendant))
+    
+    def ancestor_paths_iterator(self, descendant):
+        '''
+        Returns an iterator over the paths from descendant to the members of self without parents (K5, for a K5Family), following the parents of self.DTR_parents_map. Each path is a list of member indexes, starting with the index of descendant.
+        '''
+        
+        offsets, parent_indexes = self.DTR_parents_map()
+        
+        stack = [[self.index(descendant)]]
+        
+        while stack:
+            path = stack.pop()
+            
+            parents = parent_indexes[offsets[path[-1]]:offsets[path[-1]+1]]
+            
+            if not len(parents):
+                yield path
+                
+            for parent in reversed(parents.tolist()):
+                stack.append(path + [parent])
+    
+    def reset_DTR_parents(self):
+        '''
+        Empties the cache of self.DTR_parents_map.
+        '''
+        
+        self.DTR_parent_offsets = np.zeros(1, dtype = np.int64)
+        self.DTR_parent_indexes = np.zeros(0, dtype = np.int64)
+    
+    def _forget_member(self, graph):
+        '''
+        Same as eGraphSet._forget_member. Also resets the cache of self.DTR_parents_map, as the indexes of the following members change.
+        '''
+        
+        super(Family, self)._forget_member(graph)
+        
+        self.reset_DTR_parents()
+    
+# =============================================================================
+
+    def remove(self, graph):
+        '''
+        Same as eGraphSet.remove. Also removes graph from self.tree and self.expanded.
+        '''
+        
+        self.remove_members([graph])
+        
+    def remove_members(self, graphs):
+        '''
+        Removes the graphs, members of self, from self, self.tree and self.expanded. The tree is updated once for all the graphs (see FamilyTree.remove_vertices). Raises a KeyError if a graph is not in self.
+        '''
+        
+        graphs = list(graphs)
+        
+        indexes = [self.index(graph) for graph in graphs]
+        
+        for graph in graphs:
+            super(Family, self).remove(graph)
+            self.expanded.pop(graph, None)
+            
+        self.tree.remove_vertices(indexes)
+        
+    def difference_update(self, *others):
+        '''
+        Removes the members of self that are in any of others, updating self.tree once (see self.remove_members).
+        '''
+        
+        self.remove_members([graph for graph in self if any(graph in other for other in others)])
+        
+    def intersection_update(self, *others):
+        '''
+        Removes the members of self that are not in all of others, updating self.tree once (see self.remove_members).
+        '''
+        
+        self.remove_members([graph for graph in self if not all(graph in other for other in others)])
+        
+    def pop(self, index = None):
+        '''
+        Same as eGraphSet.pop. Also removes the member from self.tree and self.expanded.
+        '''
+        
+        if index is None: index = -1
+        if index < 0: index += len(self)
+        
+        graph = super(Family, self).pop(index)
+        
+        self.expanded.pop(graph, None)
+        self.tree.remove_vertex(index)
+        
+        return graph
+    
+    def clear(self):
+        '''
+        Same as eGraphSet.clear. Also empties self.tree, self.expanded and the cache of self.DTR_parents_map.
+        '''
+        
+        super(Family, self).clear()
+        
+        self.tree = FamilyTree()
+        self.expanded.clear()
+        self.reset_DTR_parents()
+    
+# =============================================================================
+
+                
+    def descendants_iterator(self, conditions = dict(), only_nonisomorphic = True, **kwargs):
+        '''
+        This returns an iterable over the elements of self corresponding to the conditions, in increasing order. It will first iterate over elements already calculated, and then, if possible, calculates the next elements. See self.layers_iterator, to which kwargs is passed.
         
         Options:
-            conditions -     dict -   Default: dict(). If empty dict, returns an iterator over all descendants.
+            conditions -     dict -   Default: dict(). If empty dict, returns an iterator over all descendants. Note that, if conditions has no 'order', the iterator is infinite.
         '''
         
+        max_order = None
+        
         if 'order' in conditions:
-            no_max_order = False
-        else:
-            no_max_order = True
-            conditions['order'] = 3 # ***TODO*** Fix me.
+            max_order = max(cf.convert_to_iterable(conditions['order']))
+            
+        for layer in self.layers_iterator(max_order = max_order, only_nonisomorphic = only_nonisomorphic, **kwargs):
+            for member in layer.member_iterator(conditions):
+                yield member
+                
+# =============================================================================
+
+    def layers_iterator(self, max_order = None, only_nonisomorphic = True, keep_layers = True, spill = None, canonical_augmentation = False, checkpoint = None, checkpoint_interval = 64, **kwargs):
+        '''
+        Returns an iterator over the layers of self, where a layer is an eGraphSet of all descendants of a given order. The first layer contains the members of self of least order, and, since a DTE increases the order by exactly 1, each next layer is calculated in one pass over the children of the previous layer. kwargs is passed to each graph.children_iterator.
+        
+        With keep_layers = True, every child is added to self with self.add_child, so when only_nonisomorphic is True it is checked against all the members of self by canonical certificate, and an isomorphic member is put in the layer instead. With keep_layers = False, self is not looked up, and each child is only checked against the layer being built. With canonical_augmentation, no child is checked. Descendants of the previous layer which are already expanded are not expanded again; their children are read from self.tree.
+        
+        Options:
+            max_order -     int -       Default: None. The order of the last layer. If None, the iterator is infinite.
+            
+            only_nonisomorphic -    bool -  Whether each layer contains only non-isomorphic descendants, or all labelled descendants.
+            
+            keep_layers -   bool -      Default: True. If True, the descendants are added to self and to self.tree. If False, self is not modified, and only the current and the next layers are kept in memory.
+            
+            spill -         function -  Default: None. If not None, spill(layer) is called on every layer once the next layer has been calculated, before the layer is discarded. For instance, spill = lambda layer: layer.save().
+            
+            canonical_augmentation -    bool -  Default: False. If True, each descendant only returns its children for which it is the canonical parent (see DTEGraph.is_canonical_expansion), so every isomorphism class is generated exactly once and the layers are not checked for duplicates. Requires only_nonisomorphic to be True.
+            
+            checkpoint -    str -       Default: None. If not None, the filename of an append-only checkpoint of self, in the binary eGraphSet format. If the file does not exist, the members of self are written to it first. The new descendants and the expansions are then appended every checkpoint_interval expansions, and before every layer is yielded. If the file exists, it must be a checkpoint of self, as returned by self.resume(checkpoint), so that an interrupted enumeration continues where it left off: expanded descendants are not expanded again. Requires keep_layers to be True.
+            
+            checkpoint_interval -   int -   Default: 64. The number of expansions between two writes to checkpoint.
+        '''
         
+        # Isomorphic children are discarded when only_nonisomorphic is True, so only one edge pair per automorphism orbit needs to be expanded. All labelled children are kept otherwise.
+        if only_nonisomorphic:
+            kwargs.setdefault('orbit_pruning', True)
+        
+        if canonical_augmentation:
+            kwargs['canonical_augmentation'] = True
+            kwargs['only_nonisomorphic'] = True
+            
+        # With canonical augmentation, the children of different descendants are never isomorphic.
+        require_nonisomorphic = only_nonisomorphic and not canonical_augmentation
+        
+        if not self: return
+        
+        writer = None
+        
+        if checkpoint is not None:
+            if not keep_layers:
+                raise UnsupportedOption('checkpoint requires keep_layers to be True.')
+            
+            writer = self.open_checkpoint(checkpoint)
             
-        while no_max_order or conditions['order']>0:
+        expansions_count = 0
         
-            # First, we iterate over the preexisting members of self.
+        order = min(self.indexes['order'])
+        
+        layer = eGraphSet()
+        
+        for member in self.member_iterator(conditions = {'order': order}):
+            layer.add(member, certificate = self.member_certificates[member])
+            
+        try:
+            while max_order is None or order <= max_order:
+                
+                if writer is not None: self.flush_checkpoint(writer)
+                
+                yield layer
+                
+                if max_order is not None and order == max_order: break
+                
+                next_layer = eGraphSet()
+                
+                for descendant in layer:
+                    
+                    if keep_layers and self.expanded[descendant]:
+                        for child in self.tree_children(descendant):
+                            next_layer.add(child, certificate = self.member_certificates[child])
+                            
+                        continue
+                    
+                    # The members of self from first_new_index on are the new children of descendant.
+                    first_new_index = len(self)
+                    children = []
+                    
+                    for child in descendant.children_iterator(**kwargs):
+                        
+                        if not keep_layers:
+                            next_layer.add_graph(child, require_nonisomorphic = require_nonisomorphic)
+                            continue
+                        
+                        # The child is converted here, so that the graph added to self is the one added to next_layer.
+                        child = eGraph.eGraph_copy(child, graph_class = self.graph_class, immutable = True)
+                        certificate = eGraph.canonical_certificate(child)
+                        
+                        duplicate_graph = self.add_child(child, parent = descendant, convert_to_eGraph = False, require_nonisomorphic = require_nonisomorphic, certificate = certificate)
+                        
+                        if duplicate_graph is not None: child = duplicate_graph
+                        
+                        next_layer.add(child, certificate = certificate)
+                        children.append(child)
+                        
+                    if keep_layers:
+                        self.set_expanded(descendant)
+                        
+                    if writer is not None:
+                        self.write_checkpoint_expansion(writer, descendant, children, first_new_index)
+                        expansions_count += 1
+                        
+                        if expansions_count % checkpoint_interval == 0: self.flush_checkpoint(writer)
+                        
+                if spill is not None:
+                    spill(layer)
+                    
+                layer = next_layer
+                order += 1
+                
+                if not layer: break
 
-            for member in self.member_iterator(conditions = conditions):
-                yield member
+        finally:
+            if writer is not None: self.close_checkpoint(writer)
 
+# =============================================================================
 
-            # Next, we iterate over the children of preexisting members of self.
+    def streaming_descendants_iterator(self, conditions = dict(), max_order = None, canonical_augmentation = False, sink = None, dedup_store = None, **kwargs):
+        '''
+        Returns an iterator over the nonisomorphic descendants of the members of self of least order, up to max_order, which satisfy the conditions. Unlike self.descendants_iterator, self is not modified and no descendant is kept once its children have been generated: the descendants are generated depth first, and isomorphic descendants are recognized by the 64-bit hashes of their canonical certificates (see common.storage.certificate_hash), so memory is bounded by the depth times the number of children, plus one hash per descendant. kwargs is passed to each graph.children_iterator.
+        
+        The descendants are yielded in depth first order, not by increasing order.
+        
+        Options:
+            conditions -    dict -      Default: dict(). A count_name to count_value dictionary, as in graph.satisfies. All descendants up to max_order are generated, but only the ones satisfying the conditions are yielded.
+            
+            max_order -     int -       Default: None. The maximum order of the descendants. If None, the maximum of conditions['order'] is used. Raises an Underdefined exception if neither is given.
+            
+            canonical_augmentation -    bool -  Default: False. If True, each descendant only returns its children for which it is the canonical parent (see DTEGraph.is_canonical_expansion), so every isomorphism class is generated exactly once, and no certificate hash is kept at all.
+            
+            sink -          function -  Default: None. If not None, sink(descendant) is called on every yielded descendant. For instance, sink = common.graphs.graph6_sink(f) writes the descendants to the file f.
+            
+            dedup_store -   object -    Default: None. The store of the certificate hashes, an object supporting `in` and add, such as a set or a common.hashstore.HashStore, which keeps the hashes in a compact table and can spill them to disk. If None, a set is used.
+        '''
+        
+        if max_order is None and 'order' in conditions:
+            max_order = max(cf.convert_to_iterable(conditions['order']))
+            
+        if max_order is None:
+            raise Underdefined('Either max_order or conditions[\'order\'] must be given, since there are infinitely many descendants.')
+        
+        kwargs.setdefault('orbit_pruning', True)
+        
+        if canonical_augmentation:
+            kwargs['canonical_augmentation'] = True
+            kwargs['only_nonisomorphic'] = True
+            
+        if not self: return
+        
+        order = min(self.indexes['order'])
+        
+        # The stack holds the descendants whose children have not been generated yet.
+        stack = list(reversed(list(self.member_iterator(conditions = {'order': order}))))
+        
+        if dedup_store is None: dedup_store = set()
+        
+        certificate_hashes = dedup_store
+        
+        for member in stack:
+            certificate_hashes.add(cst.certificate_hash(self.member_certificates[member]))
+        
+        while stack:
+            
+            descendant = stack.pop()
+            
+            if descendant.satisfies(conditions):
+                if sink is not None: sink(descendant)
+                
+                yield descendant
+                
+            if descendant.order() >= max_order: continue
+            
+            children = []
             
-            if no_max_order:
-                conditions['order'] += 1
-            else:    
-                conditions['order'] -= 1
+            for child in descendant.children_iterator(**kwargs):
+                
+                child = eGraph.eGraph_copy(child, graph_class = self.graph_class, immutable = True)
                 
-            conditions['expanded'] = False
+                if not canonical_augmentation:
+                    certificate_hash = cst.certificate_hash(eGraph.canonical_certificate(child))
+                    
+                    if certificate_hash in certificate_hashes: continue
+                    
+                    certificate_hashes.add(certificate_hash)
+                    
+                children.append(child)
+                
+            stack.extend(reversed(children))
+    
+# =============================================================================
+
+    @classmethod
+    def resume(cls, checkpoint):
+        '''
+        Returns the family checkpointed to the file checkpoint by self.layers_iterator, to be passed again as the checkpoint option to continue the enumeration. The members written after the last expansion block, left by an interruption, are dropped from the file (see common.storage.truncate_unconfirmed_records): their parents were not recorded as expanded, and are expanded again.
+        '''
+        
+        cst.truncate_unconfirmed_records(checkpoint)
+        
+        return cls.load(checkpoint, extension = None, path = "")
+    
+# =============================================================================
+
+    def open_checkpoint(self, checkpoint):
+        '''
+        Returns a common.storage.Writer appending to the file checkpoint. If the file does not exist, it is created, and the members of self are written to it. If it exists, it is truncated after its last expansion block, as by self.resume, and a ValueError is raised if its number of members is not that of self.
+
+        The writer only writes blocks when flushed by self.flush_checkpoint, so that the records of new children are always followed by the expansions of their parents.
+        '''
+        
+        import os.path
+        
+        if os.path.isfile(checkpoint):
+            records_count = cst.truncate_unconfirmed_records(checkpoint)
+            
+            if records_count != len(self):
+                raise ValueError(checkpoint+' is not a checkpoint of self: it has '+str(records_count)+' members, and self has '+str(len(self))+'.')
+            
+            return cst.Writer(open(checkpoint, "ab"), None, auto_flush = False)
+        
+        writer = cst.Writer(open(checkpoint, "wb"), self.storage_metadata(), auto_flush = False)
+        
+        for descendant in self:
+            writer.write(self.storage_record(descendant))
+            
+        self.flush_checkpoint(writer)
+        
+        return writer
+    
+# =============================================================================
+
+    def write_checkpoint_expansion(self, writer, descendant, children, first_new_index):
+        '''
+        Writes the members of self from first_new_index on, the new children of descendant, and the expansion of descendant to writer. The edges from descendant to its children are only recorded by the expansion.
+        '''
+        
+        for index in range(first_new_index, len(self)):
+            writer.write(self.storage_record(self[index])._replace(parents = []))
             
-            for descendant in self.descendants_iterator(conditions):
-                for child in descendant.children_iterator(only_nonisomorphic = only_nonisomorphic):
-                    yield child
+        writer.write_expansion(self.index(descendant), [self.index(child) for child in children])
+    
+# =============================================================================
+
+    def flush_checkpoint(self, writer):
+        '''
+        Writes the pending blocks of writer to disk, the records followed by an expansion block confirming them.
+        '''
+        
+        import os
+        
+        writer.flush(confirm = True)
+        writer.file.flush()
+        os.fsync(writer.file.fileno())
+    
+# =============================================================================
+
+    def close_checkpoint(self, writer):
+        '''
+        Writes the pending blocks of writer to disk, and closes its file.
+        '''
+        
+        self.flush_checkpoint(writer)
+        writer.file.close()
 
     
 # =============================================================================
@@ -253,6 +941,39 @@ class Family(eGraphSet):
 #
 # =============================================================================  
 
+
+def expand_descendant(task):
+    '''
+    Function expand_descendant(task): tuple -> list
+    
+    Expands a single descendant, and returns a list of (certificate, edges, multiedges, loops) tuples, one per child, in the order they were generated. This is run by the worker processes of Family.parallel_children_iterator, so both its input and output are compact and picklable.
+    
+    task is a (graph_class, edges, multiedges, loops, only_nonisomorphic, serialized_kwargs) tuple, where edges is the edge list of the descendant and serialized_kwargs is the dill serialization of the kwargs passed to descendant.children_iterator. If only_nonisomorphic, isomorphic children are only returned once.
+    '''
+    
+    import dill
+    
+    graph_class, edges, multiedges, loops, only_nonisomorphic, serialized_kwargs = task
+    
+    kwargs = dill.loads(serialized_kwargs)
+    
+    descendant = graph_class(edges, multiedges = multiedges, loops = loops)
+    
+    children = []
+    certificates = set()
+    
+    for child in descendant.children_iterator(**kwargs):
+        
+        certificate = eGraph.canonical_certificate(child)
+        
+        if only_nonisomorphic and certificate in certificates: continue
+        
+        certificates.add(certificate)
+        children.append((certificate, child.edges(labels = False), child.allows_multiple_edges(), child.allows_loops()))
+        
+    return children
+
+
     
 # =============================================================================
 #     
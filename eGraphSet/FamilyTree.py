@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:12:37 2026
+
+@author: Mohamed Laradji
+"""
+
+# =============================================================================
+# This library could be imported via:
+#   from eGraphSet.FamilyTree import FamilyTree
+# =============================================================================
+
+import numpy as np
+
+# =============================================================================
+#
+# =============================================================================
+
+class FamilyTree(object):
+    '''
+    The family tree of a Family: a directed acyclic graph whose vertices are the indexes of the members of the family, with an edge from each descendant to the children it was expanded into.
+
+    The edges are stored in compressed sparse row (CSR) form, twice: the children of vertex i are children_indexes[children_offsets[i]:children_offsets[i+1]], and its parents are parents_indexes[parents_offsets[i]:parents_offsets[i+1]], both in increasing order. Edges added since the arrays were last built are kept in small dictionaries, and merged into the arrays once there are as many of them as there are edges in the arrays, so that adding an edge takes amortized constant time.
+
+    A sage DiGraph of the tree is only built when needed, by self.to_digraph.
+
+   Attributes:
+       self.vertices_count -    int -   The number of vertices 0, 1, ..., vertices_count-1 of self.
+    '''
+
+    # The minimum number of new edges before they are merged into the arrays.
+    min_new_edges = 1024
+
+    def __init__(self):
+        '''
+        Initialize an empty FamilyTree by T = FamilyTree().
+        '''
+
+        self.vertices_count = 0
+
+        self.set_edges(np.zeros(0, dtype = np.int64), np.zeros(0, dtype = np.int64))
+
+
+# =============================================================================
+
+
+    def __len__(self):
+        return self.vertices_count
+
+    def order(self):
+        '''
+        Returns the number of vertices of self.
+        '''
+
+        return self.vertices_count
+
+    def size(self):
+        '''
+        Returns the number of edges of self.
+        '''
+
+        return len(self.children_indexes) + self.new_edges_count
+
+
+# =============================================================================
+
+
+    def add_vertex(self, index):
+        '''
+        Adds the vertex index to self, and the vertices before it if they are not in self already.
+        '''
+
+        self.vertices_count = max(self.vertices_count, index + 1)
+
+    def add_edge(self, parent, child):
+        '''
+        Adds the edge from parent to child to self, and their vertices if they are not in self already. Does nothing if the edge is already in self.
+        '''
+
+        if self.has_edge(parent, child): return
+
+        self.add_vertex(max(parent, child))
+
+        self.new_children.setdefault(parent, []).append(child)
+        self.new_parents.setdefault(child, []).append(parent)
+        self.new_edges_count += 1
+
+        if self.new_edges_count >= max(self.min_new_edges, len(self.children_indexes)):
+            self.compact()
+
+    def has_edge(self, parent, child):
+        '''
+        Returns True if the edge from parent to child is in self, and False otherwise.
+        '''
+
+        if parent < len(self.children_offsets) - 1:
+            children = self.children_indexes[self.children_offsets[parent]:self.children_offsets[parent+1]]
+
+            position = np.searchsorted(children, child)
+
+            if position < len(children) and children[position] == child: return True
+
+        return child in self.new_children.get(parent, ())
+
+    def remove_vertex(self, index):
+        '''
+        Removes the vertex index and its edges from self. The following vertices are shifted down by one, as the indexes of the members of a Family after a removal.
+        '''
+
+        self.remove_vertices([index])
+
+    def remove_vertices(self, indexes):
+        '''
+        Removes the vertices of indexes and their edges from self, in one pass over the edges. The other vertices are shifted down by the number of removed vertices before them, as the indexes of the members of a Family after the removals.
+        '''
+
+        removed = np.unique(np.asarray(list(indexes), dtype = np.int64))
+
+        if not len(removed): return
+
+        sources, targets = self.edges()
+
+        kept = ~(np.isin(sources, removed) | np.isin(targets, removed))
+
+        sources, targets = sources[kept], targets[kept]
+
+        sources -= np.searchsorted(removed, sources)
+        targets -= np.searchsorted(removed, targets)
+
+        self.vertices_count = max(0, self.vertices_count - int(np.count_nonzero(removed < self.vertices_count)))
+
+        self.set_edges(sources, targets)
+
+
+# =============================================================================
+
+
+    def children(self, index):
+        '''
+        Returns the list of the children of the vertex index.
+        '''
+
+        return self.neighbors(index, self.children_offsets, self.children_indexes, self.new_children)
+
+    def parents(self, index):
+        '''
+        Returns the list of the parents of the vertex index.
+        '''
+
+        return self.neighbors(index, self.parents_offsets, self.parents_indexes, self.new_parents)
+
+    def neighbors(self, index, offsets, indexes, new_neighbors):
+        '''
+        Returns the list of the neighbors of the vertex index in the CSR arrays offsets and indexes, followed by its neighbors in the new_neighbors dictionary.
+        '''
+
+        if index < len(offsets) - 1:
+            neighbors = indexes[offsets[index]:offsets[index+1]].tolist()
+
+        else:
+            neighbors = []
+
+        return neighbors + new_neighbors.get(index, [])
+
+    def children_count(self, index):
+        '''
+        Returns the number of children of the vertex index.
+        '''
+
+        return len(self.children(index))
+
+    def parents_count(self, index):
+        '''
+        Returns the number of parents of the vertex index.
+        '''
+
+        return len(self.parents(index))
+
+
+# =============================================================================
+
+
+    def edges(self):
+        '''
+        Returns (sources, targets), two NumPy int64 arrays of the parents and children of the edges of self, sorted by parent and then by child.
+        '''
+
+        self.compact()
+
+        sources = np.repeat(np.arange(len(self.children_offsets) - 1, dtype = np.int64), np.diff(self.children_offsets))
+
+        return sources, self.children_indexes.copy()
+
+    def compact(self):
+        '''
+        Merges the edges added since the last call into the CSR arrays.
+        '''
+
+        if not self.new_edges_count and len(self.children_offsets) == self.vertices_count + 1: return
+
+        sources = np.repeat(np.arange(len(self.children_offsets) - 1, dtype = np.int64), np.diff(self.children_offsets))
+        targets = self.children_indexes
+
+        new_sources = [parent for parent, children in self.new_children.items() for child in children]
+        new_targets = [child for parent, children in self.new_children.items() for child in children]
+
+        self.set_edges(np.concatenate([sources, np.array(new_sources, dtype = np.int64)]), np.concatenate([targets, np.array(new_targets, dtype = np.int64)]))
+
+    def set_edges(self, sources, targets):
+        '''
+        Replaces the edges of self by the edges from sources to targets, two NumPy int64 arrays without repeated edges, and builds the CSR arrays.
+        '''
+
+        n = self.vertices_count
+
+        order = np.lexsort((targets, sources))
+
+        self.children_offsets = np.concatenate([[0], np.cumsum(np.bincount(sources, minlength = n))]).astype(np.int64)
+        self.children_indexes = targets[order]
+
+        order = np.lexsort((sources, targets))
+
+        self.parents_offsets = np.concatenate([[0], np.cumsum(np.bincount(targets, minlength = n))]).astype(np.int64)
+        self.parents_indexes = sources[order]
+
+        self.new_children = dict()
+        self.new_parents = dict()
+        self.new_edges_count = 0
+
+
+# =============================================================================
+
+
+    def to_digraph(self, vertices = None, labels = None):
+        '''
+        Returns the sage DiGraph of self, or of the subgraph induced by vertices, an iterable of vertex indexes, if specified.
+
+        Options:
+            labels -    sequence -  Default: None. If not None, the vertex i of the DiGraph is labels[i] instead of i. For instance, a Family, so that the vertices are its members.
+        '''
+
+        from sage.graphs.digraph import DiGraph
+
+        sources, targets = self.edges()
+
+        if vertices is None:
+            vertices = np.arange(self.vertices_count, dtype = np.int64)
+
+        else:
+            vertices = np.array(sorted(set(vertices)), dtype = np.int64)
+
+            kept = np.isin(sources, vertices) & np.isin(targets, vertices)
+
+            sources, targets = sources[kept], targets[kept]
+
+        if labels is None:
+            label = int
+
+        else:
+            label = lambda index: labels[int(index)]
+
+        tree = DiGraph(name = "Family Tree", multiedges = False, loops = False)
+
+        tree.add_vertices([label(index) for index in vertices])
+        tree.add_edges([(label(parent), label(child)) for parent, child in zip(sources, targets)])
+
+        return tree
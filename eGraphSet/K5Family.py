@@ -70,6 +70,18 @@ class K5Family(Family):
         self.has_been_modified()
 
         
+# =============================================================================      
+        
+       
+    @classmethod
+    def _empty(cls):
+        '''
+        Returns an empty K5Family, without K5, to be filled by cls.load.
+        '''
+        
+        return cls(add_K5 = False)
+
+        
 # =============================================================================      
         
        
@@ -297,32 +309,22 @@ class K5Family(Family):
                 
     def descendants_iterator(self, order = None, level = None, **kwargs):
         '''
-        This returns an iterable over the elements of self corresponding to the options. It will first iterate over elements already calculated, and then, if possible, calculates the next elements.
+        This returns an iterable over the elements of self corresponding to the options, in increasing order. It will first iterate over elements already calculated, and then, if possible, calculates the next elements. kwargs is passed to self.layers_iterator.
         
         Options:
-            order -     int -   Default: None. If None, returns all orders (Note that they are infinite in number!).
+            order -     int -   Default: None. The maximum order. If None, returns all orders (Note that they are infinite in number!).
             level -     int -   Default: None. If None, all levels are returned.
         '''
         
-        no_max_order = False
+        conditions = dict()
         
-        if order is None:
-            order = 0
-            no_max_order = True
+        if level is not None:
+            conditions['level'] = level
             
-        while no_max_order or order>0:
-        
-            # First, we iterate over the preexisting members of self.
-
-            for member in self.member_iterator(order = order, level = level, **kwargs):
+        for layer in self.layers_iterator(max_order = order, **kwargs):
+            for member in layer.member_iterator(conditions):
                 yield member
 
-
-            # Next, we iterate over the children of preexisting members of self.
-
-            for child in self.children_iterator(order = order, level = level, **kwargs):
-                yield child
-
     
 # =============================================================================
 #     
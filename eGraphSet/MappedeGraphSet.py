@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:42:08 2026
+
+@author: Mohamed Laradji
+"""
+
+# =============================================================================
+# This library could be imported via:
+#   from eGraphSet.MappedeGraphSet import MappedeGraphSet
+# =============================================================================
+
+import numpy as np
+
+from eGraph.eGraph import eGraph, canonical_certificate
+from eGraphSet import eGraphSet, load_filename, set_stored_counts, subclass_named
+from common import functions as cf
+from common import storage as cst
+
+# =============================================================================
+#
+# =============================================================================
+
+class MappedeGraphSet(object):
+    '''
+    A read-only view of an eGraphSet saved in the binary eGraphSet format (see common.storage), which is memory-mapped instead of loaded. Opening it only reads the block headers of the file, and members are only decoded into graphs when they are accessed, so that very large families can be queried without materializing them.
+
+    Conditions on 'order', 'level' and 'triangles_count' are answered by scanning the corresponding columns of the file, and membership by scanning its certificate hashes.
+
+   Attributes:
+       self.file -          common.storage.MappedFile - The mapped file.
+       self.metadata -      dict -  The metadata of the file (see eGraphSet.storage_metadata).
+       self.graph_class -   class - The class of the decoded members.
+    '''
+
+    type = 'Mapped eGraphSet'      # class variable shared by all instances
+
+    # The counts stored as columns of the binary format.
+    column_count_names = ('order', 'level', 'triangles_count')
+
+    def __init__(self, filename, graph_class = None):
+        '''
+        Maps the binary eGraphSet file filename. If graph_class is None, the members are decoded as the subclass of eGraph named in the file, if it has been imported, and as eGraphs otherwise.
+        '''
+
+        self.file = cst.MappedFile(filename)
+        self.metadata = self.file.metadata
+
+        if graph_class is None:
+            graph_class = subclass_named(eGraph, self.metadata.get('graph_class'))
+
+        self.graph_class = graph_class
+
+        self._expansions = None
+
+
+# =============================================================================
+
+
+    def __len__(self):
+        return len(self.file)
+
+    def __iter__(self):
+        for index in range(0, len(self)):
+            yield self[index]
+
+    def __getitem__(self, index):
+        '''
+        Returns the member of index, decoded from the file. Every access decodes a new graph.
+        '''
+
+        return self.decode(self.file.record(index))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *pargs):
+        self.close()
+
+    def count(self):
+        '''
+        Returns the number of graphs in self.
+        '''
+
+        return len(self)
+
+
+# =============================================================================
+
+
+    def decode(self, record):
+        '''
+        Returns the graph of record, with its stored counts set (see eGraphSet.set_stored_counts).
+        '''
+
+        graph = cst.decode_graph(record, self.graph_class)
+
+        set_stored_counts(graph, record)
+
+        return graph
+
+
+# =============================================================================
+
+
+    def expanded(self, index):
+        '''
+        Returns the expanded flag of the member of index, including the expansions of a checkpoint.
+        '''
+
+        return bool(self.file.record(index).flags & cst.EXPANDED) or index in self.expansions()[0]
+
+    def parents(self, index):
+        '''
+        Returns the list of the indexes of the parents of the member of index, including the expansions of a checkpoint.
+        '''
+
+        parents = [int(parent) for parent in self.file.record(index).parents]
+
+        for parent in self.expansions()[1].get(index, ()):
+            if parent not in parents: parents.append(parent)
+
+        return parents
+
+    def expansions(self):
+        '''
+        Returns (expanded, parents), where expanded is the set of the indexes of the members expanded in the expansion blocks of the file, and parents is a child index to list of parent indexes dictionary. They are read from the file once.
+        '''
+
+        if self._expansions is None:
+            expanded, parents = set(), dict()
+
+            for expansion in self.file.expansions_iterator():
+                expanded.add(expansion.descendant)
+
+                for child in expansion.children:
+                    parents.setdefault(child, []).append(expansion.descendant)
+
+            self._expansions = (expanded, parents)
+
+        return self._expansions
+
+    def certificate(self, index):
+        '''
+        Returns the canonical certificate of the member of index, or None if it was not saved.
+        '''
+
+        return cst.decode_certificate(self.file.record(index))
+
+
+# =============================================================================
+
+
+    def member_indexes(self, conditions = dict(), complement = False):
+        '''
+        Returns an iterator over the indexes of the members of self that satisfy the conditions, in increasing order. The conditions are as in graph.satisfies.
+
+        Conditions on self.column_count_names are checked on the columns of the file, one block at a time, and only the members passing them are decoded to check the remaining conditions, if any.
+
+        Options:
+            complement - bool - If True, returns the indexes of the members that do not satisfy the conditions.
+        '''
+
+        column_conditions = dict((count_name, condition_values(conditions[count_name])) for count_name in conditions if count_name in self.column_count_names)
+        remaining_conditions = dict((count_name, conditions[count_name]) for count_name in conditions if count_name not in self.column_count_names)
+
+        for first_index, k, columns in self.file.blocks_iterator():
+
+            candidates = np.ones(k, dtype = bool)
+
+            # Members whose stored count is missing are decoded and checked on all conditions.
+            unknown = np.zeros(k, dtype = bool)
+
+            for count_name, count_values in column_conditions.items():
+                column = columns[count_name]
+                missing = column == cst.MISSING
+
+                candidates &= np.isin(column, count_values) | missing
+                unknown |= missing
+
+            positions = np.flatnonzero(candidates)
+
+            if remaining_conditions or unknown.any():
+                positions = [i for i in positions if self[first_index + i].satisfies(conditions if unknown[i] else remaining_conditions)]
+
+            if complement:
+                positions = np.setdiff1d(np.arange(k), positions)
+
+            for i in positions:
+                yield first_index + int(i)
+
+
+    def member_iterator(self, conditions = dict(), complement = False):
+        '''
+        Returns an iterator of the members of self that satisfy the conditions, decoded from the file. See self.member_indexes.
+        '''
+
+        for index in self.member_indexes(conditions, complement = complement):
+            yield self[index]
+
+
+# =============================================================================
+
+
+    def index_of(self, graph, certificate = None):
+        '''
+        Returns the index of a member of self isomorphic to graph, or None if there is none. Only the certificate hash column is scanned, and the stored certificates of the members with the same hash are compared.
+
+        Options:
+            certificate -   tuple -     The canonical certificate of graph, if already known. If None, it is calculated.
+        '''
+
+        if certificate is None:
+            certificate = canonical_certificate(graph)
+
+        certificate_hash = cst.certificate_hash(certificate)
+
+        for first_index, k, columns in self.file.blocks_iterator():
+            for i in np.flatnonzero(columns['certificate_hash'] == certificate_hash):
+                if self.certificate(first_index + int(i)) == certificate:
+                    return first_index + int(i)
+
+        return None
+
+
+    def contains(self, graph, certificate = None):
+        '''
+        Returns the member of self isomorphic to graph, decoded from the file, or None if there is none. See self.index_of.
+        '''
+
+        index = self.index_of(graph, certificate = certificate)
+
+        if index is None: return None
+
+        return self[index]
+
+
+# =============================================================================
+
+
+    def load(self):
+        '''
+        Returns the set saved in the file, fully loaded (see eGraphSet.load).
+        '''
+
+        return eGraphSet.load(self.file.filename, extension = None, path = "", graph_class = self.graph_class)
+
+
+    def close(self):
+        '''
+        Unmaps the file. Members already decoded remain valid.
+        '''
+
+        self.file.close()
+
+
+# =============================================================================
+#
+#   Functions
+#
+# =============================================================================
+
+
+def condition_values(count_values):
+    '''
+    Returns the list of the values allowed by a condition of graph.satisfies: count_values if it is iterable, and [count_values] otherwise.
+    '''
+
+    return list(cf.convert_to_iterable(count_values))
+
@@ -28,9 +28,11 @@ import itertools
 import copy
 import time
 
-from eGraph.eGraph import eGraph, eGraph_copy
+from eGraph.eGraph import eGraph, eGraph_copy, canonical_certificate
 #import common.graphs as cg
 from common import functions as cf
+from common import storage as cst
+from common.exceptions import FileDoesntExist
 
 # =============================================================================
 #
@@ -41,6 +43,12 @@ class eGraphSet(setutils.IndexedSet):
    Attributes:   
        self.counts -                    dict -  This is an eGraph to dict dictionary, which currently contains 'order' and 'level'.
        
+       self.certificates -              dict -  This is a canonical certificate to list of members dictionary. It is used to look up isomorphic members without isomorphism tests.
+       self.member_certificates -       dict -  This is a member to canonical certificate dictionary, the inverse of self.certificates.
+       
+       self.indexes -                   dict -  This is a count_name to (count_value to set of members) dictionary. self.member_iterator uses it to answer conditions on indexed counts without calling graph.satisfies on every member. See self.add_index.
+       self.member_invariants -         dict -  This is a member to (count_name to count_value) dictionary, recording the values under which each member is indexed.
+       
        self.expanded_triangle_types     dict -  This is a Graph to expanded triangle types dict (of form [a,b,c,d] where a,b,c,d in {0,1}).
        
        self.version                     - This is a number indicating the version of the Family module.
@@ -50,11 +58,21 @@ class eGraphSet(setutils.IndexedSet):
 
     type = 'eGraphSet'      # class variable shared by all instances
     
+    # The counts indexed by default. More can be indexed with self.add_index.
+    index_count_names = ('order', 'level', 'triangles_count', 'degree_sequence')
+    
     def __init__(self, *pargs, **kwargs):
         '''
         Initialize a Family by F=Family().
         '''
         
+        # The certificate and invariant indexes need to exist before super().__init__, since it may add members.
+        self.certificates = dict()
+        self.member_certificates = dict()
+        
+        self.indexes = dict((count_name, dict()) for count_name in self.index_count_names)
+        self.member_invariants = dict()
+        
         super(eGraphSet, self).__init__(*pargs, **kwargs)
         
         self.creation_date=time.strftime('%Y-%m-%d_%H:%M:%S')
@@ -91,10 +109,180 @@ class eGraphSet(setutils.IndexedSet):
         return len(self)         
         
         
+# =============================================================================
+
+
+    def add(self, graph, certificate = None):
+        '''
+        Adds graph to self, records its canonical certificate in self.certificates, and adds it to the buckets of self.indexes.
+        
+        Options:
+            certificate -   tuple -     The canonical certificate of graph, if already known. If None, it is calculated.
+        '''
+        
+        if graph in self: return
+        
+        if certificate is None:
+            certificate = canonical_certificate(graph)
+            
+        elif isinstance(graph, eGraph) and graph.cached_count('canonical_certificate') is None:
+            graph.set_count('canonical_certificate', count_value = certificate)
+        
+        super(eGraphSet, self).add(graph)
+        
+        self.member_certificates[graph] = certificate
+        self.certificates.setdefault(certificate, []).append(graph)
+        
+        self.member_invariants[graph] = dict()
+        
+        for count_name in self.indexes:
+            self._index_member(graph, count_name)
+        
+        return
+    
+    
+# =============================================================================
+
+
+    def remove(self, graph):
+        '''
+        Removes graph from self, self.certificates and self.indexes. Raises a KeyError if graph is not in self.
+        '''
+        
+        super(eGraphSet, self).remove(graph)
+        
+        self._forget_member(graph)
+        
+        return
+    
+    
+# =============================================================================
+
+
+    def pop(self, *pargs, **kwargs):
+        '''
+        Removes and returns a member of self, by default the last one. Same arguments as IndexedSet.pop.
+        '''
+        
+        graph = super(eGraphSet, self).pop(*pargs, **kwargs)
+        
+        self._forget_member(graph)
+        
+        return graph
+    
+    
+# =============================================================================
+
+
+    def clear(self):
+        '''
+        Removes all members of self.
+        '''
+        
+        super(eGraphSet, self).clear()
+        
+        self.certificates.clear()
+        self.member_certificates.clear()
+        
+        for buckets in self.indexes.values():
+            buckets.clear()
+            
+        self.member_invariants.clear()
+        
+        return
+    
+    
+# =============================================================================
+
+
+    def _forget_member(self, graph):
+        '''
+        Removes graph from self.certificates, self.member_certificates, self.indexes and self.member_invariants.
+        '''
+        
+        certificate = self.member_certificates.pop(graph)
+        
+        isomorphic_members = self.certificates[certificate]
+        isomorphic_members.remove(graph)
+        
+        if not isomorphic_members:
+            del self.certificates[certificate]
+            
+        for count_name, count_value in self.member_invariants.pop(graph).items():
+            buckets = self.indexes[count_name]
+            
+            buckets[count_value].discard(graph)
+            
+            if not buckets[count_value]:
+                del buckets[count_value]
+            
+        return
+    
+    
+# =============================================================================
+
+
+    def _index_member(self, graph, count_name):
+        '''
+        Adds graph to the bucket of self.indexes[count_name] corresponding to graph.count(count_name).
+        '''
+        
+        count_value = graph.count(count_name)
+        
+        self.indexes[count_name].setdefault(count_value, set()).add(graph)
+        self.member_invariants[graph][count_name] = count_value
+        
+        return
+    
+    
+# =============================================================================
+
+
+    def add_index(self, count_name):
+        '''
+        Indexes the members of self by count_name, so that conditions on count_name are answered by self.member_iterator from buckets. count_name can be any count the members can calculate, for instance any key of graph.count_functions.
+        
+        Note that indexed counts are calculated for every member, including the ones added later.
+        '''
+        
+        if count_name in self.indexes: return
+        
+        self.indexes[count_name] = dict()
+        
+        for graph in self:
+            self._index_member(graph, count_name)
+            
+        return
+    
+    
+# =============================================================================
+
+
+    def indexed_members(self, count_name, count_values):
+        '''
+        Returns the set of members whose count_name is one of count_values, using self.indexes. count_values is interpreted as in graph.satisfies: an iterable of values, or a single value if it is not iterable.
+        '''
+        
+        buckets = self.indexes[count_name]
+        
+        try:
+            count_values = iter(count_values)
+            
+        except TypeError:
+            return set(buckets.get(count_values, ()))
+        
+        members = set()
+        
+        for count_value in count_values:
+            members.update(buckets.get(count_value, ()))
+            
+        return members
+    
+    
 # =============================================================================    
     
     
-    def add_graph(self, graph, require_nonisomorphic=True, no_adding=False):
+    def add_graph(self, graph, require_nonisomorphic=True, no_adding=False, certificate=None):
         '''
         This adds an immutable copy of the graph to self. Returns None if added, and if not, returns the duplicate of graph in self.
         
@@ -102,16 +290,23 @@ class eGraphSet(setutils.IndexedSet):
             require_nonisomorphic -     bool -      Whether to check for isomorphism.
             
             no_adding -                 bool -      Default: False. If True, graph is not added and self will not be modified, but the function still returns the same values.
+            
+            certificate -               tuple -     The canonical certificate of graph, if already known. If None, it is calculated when require_nonisomorphic is True, and otherwise only if graph is added.
         '''
         
-        G = graph.copy(immutable = True)
+        # This does not copy graph if it is already immutable. eGraphs keep their class, and other graphs, such as sage Graphs, are converted to eGraphs.
+        G = eGraph_copy(graph, graph_class = member_class(graph), immutable = True)
+        
+        # The certificate is only needed for the isomorphism lookup. It is then shared with the insertion.
+        if certificate is None and require_nonisomorphic:
+            certificate = canonical_certificate(G)
         
-        duplicate_graph=self.contains(G, isomorphic = require_nonisomorphic)
+        duplicate_graph=self.contains(G, isomorphic = require_nonisomorphic, certificate = certificate)
         
         if no_adding: return duplicate_graph
         
         if duplicate_graph is None:
-            self.add(G)
+            self.add(G, certificate = certificate)
         
         else:
             G = duplicate_graph
@@ -121,12 +316,70 @@ class eGraphSet(setutils.IndexedSet):
         return duplicate_graph
 
     
+# =============================================================================
+
+
+    def add_graphs(self, graphs, require_nonisomorphic = True, no_adding = False, certificates = None, workers = None):
+        '''
+        Adds immutable copies of graphs to self in one pass, and returns the list of their representatives: for each graph, in the order of graphs, the member of self isomorphic to it (or equal to it, if require_nonisomorphic is False), which is its own copy if it was added. The members added are the last members of self, in the order of graphs.
+        
+        The batch is first canonicalized, and grouped by canonical certificate (see dedup_batch), so that each isomorphism class of the batch is looked up in self once, and self.has_been_modified is called once.
+        
+        Options:
+            require_nonisomorphic -     bool -      Whether to check for isomorphism.
+            
+            no_adding -                 bool -      Default: False. If True, self is not modified, and the representatives of new graphs are their copies, as if they had been added.
+            
+            certificates -              list -      The canonical certificates of graphs, if already known. If None, they are calculated.
+            
+            workers -                   int -       Default: None. If greater than 1, the certificates are calculated in a pool of this many processes.
+        '''
+        
+        graphs = [eGraph_copy(graph, graph_class = member_class(graph), immutable = True) for graph in graphs]
+        
+        if certificates is None:
+            certificates = canonical_certificates(graphs, workers = workers)
+            
+        if not require_nonisomorphic:
+            representatives = []
+            
+            for G, certificate in zip(graphs, certificates):
+                if G in self: G = self[self.index(G)]
+                elif not no_adding: self.add(G, certificate = certificate)
+                
+                representatives.append(G)
+                
+        else:
+            unique_graphs, unique_certificates, positions = dedup_batch(graphs, certificates = certificates)
+            
+            unique_representatives = []
+            
+            for G, certificate in zip(unique_graphs, unique_certificates):
+                isomorphic_members = self.certificates.get(certificate)
+                
+                if isomorphic_members: G = isomorphic_members[0]
+                elif not no_adding: self.add(G, certificate = certificate)
+                
+                unique_representatives.append(G)
+                
+            representatives = [unique_representatives[position] for position in positions]
+            
+        if not no_adding: self.has_been_modified()
+        
+        return representatives
+
+    
 # =============================================================================
     
     
-    def contains(self, graph, isomorphic=True, optimized=True):
+    def contains(self, graph, isomorphic=True, optimized=True, certificate=None):
         '''
         If graph is in self, or if an isomorphic copy of graph is in self (if isomorphic=True), returns that graph. Else, returns None.
+        
+        Options:
+            optimized -     bool -      Default: True. If True, isomorphic copies are looked up by canonical certificate in self.certificates. If False, every member is tested with is_isomorphic.
+            
+            certificate -   tuple -     The canonical certificate of graph, if already known.
         '''
         
         
@@ -144,13 +397,17 @@ class eGraphSet(setutils.IndexedSet):
         if not isomorphic: return None
 
         if optimized:
-            restricted_set = self.member_iterator(conditions = {'order': G.order(), 'level': G.level()})
-        
-        else:
-            # This is a safe fall back option if optimized doesn't work for any reason.
-            restricted_set = self
+            if certificate is None:
+                certificate = canonical_certificate(G)
+            
+            isomorphic_members = self.certificates.get(certificate)
+            
+            if isomorphic_members: return isomorphic_members[0]
             
-        for H in restricted_set:
+            return
+            
+        # This is a safe fall back option if optimized doesn't work for any reason.
+        for H in self:
             if G.is_isomorphic(H): return H
             
         return
@@ -179,16 +436,20 @@ class eGraphSet(setutils.IndexedSet):
         Returns a restricted version of self that only contains graphs satisfying the conditions.
         '''
         
-        removed_graphs = set()
-        
-        for member in self.member_iterator(conditions, complement = True):
-            removed_graphs.add(member)
-            
         if inplace:
+            removed_graphs = set(self.member_iterator(conditions, complement = True))
+            
             self.difference_update(removed_graphs)
+            
+            return
         
-        if not inplace: 
-            return self.difference(removed_graphs)
+        # The restricted set is of the class of self, and reuses the certificates of self rather than recalculating them.
+        restricted_set = self._empty()
+        
+        for member in self.member_iterator(conditions):
+            restricted_set.add(member, certificate = self.member_certificates[member])
+            
+        return restricted_set
         
 
 # =============================================================================
@@ -197,43 +458,213 @@ class eGraphSet(setutils.IndexedSet):
         '''
         Returns an iterator of the members of self that satisfy the imposed conditions. This functions takes the same kwargs as graph.satisfies_condiions.
         
+        Conditions on counts in self.indexes are answered from the index buckets, so only the matching members are visited. The members are yielded in the order of self. Note that, if any condition is indexed, members added to self during the iteration are not visited.
+        
         Options:
             complement - bool - If True, returns members that do not satisfy the conditions.
         '''
-                    
-        # Iterate over the descendants in self.
         
-        for graph in self:
+        indexed_conditions = [count_name for count_name in conditions if count_name in self.indexes]
+        
+        if not indexed_conditions:
+            
+            # Iterate over the descendants in self.
+            
+            for graph in self:
                 
-            if complement ^ graph.satisfies(conditions): yield graph
+                if complement ^ graph.satisfies(conditions): yield graph
+                
+            return
+        
+        # Intersect the index buckets, starting from the most selective condition.
+        
+        candidates = None
+        
+        for members in sorted((self.indexed_members(count_name, conditions[count_name]) for count_name in indexed_conditions), key = len):
+            
+            if candidates is None: candidates = members
+            else: candidates.intersection_update(members)
+            
+            if not candidates: break
+            
+        remaining_conditions = dict((count_name, conditions[count_name]) for count_name in conditions if count_name not in self.indexes)
+        
+        if complement:
+            for graph in list(self):
+                if graph not in candidates or not graph.satisfies(remaining_conditions): yield graph
+                
+            return
+        
+        for graph in sorted(candidates, key = self.index):
+            if graph.satisfies(remaining_conditions): yield graph
                 
 
 # =============================================================================
 
 
-    def save(self, filename = None, extension = "egs", **kwargs):
+    def save(self, filename = None, extension = "egs", binary = True, block_size = 4096, **kwargs):
         '''
         Function self.save(**kwargs): object -> None
 
         Saves self to disk. Returns without output if succesful. 
 
-        Note that save requires both the pickle and dill modules to be installed.
+        By default, self is saved in the binary eGraphSet format (see common.storage), which stores the edges, invariants and canonical certificate of every member, and can be read back one block at a time with self.load. Note that the binary format relabels the vertices of every member 0, 1, ..., n-1, and does not keep the counts other than 'order', 'level' and 'triangles_count'.
 
         Options:
             filename -  str -   The filename to save self as. 
                                 Default: "<self.type>_V<self.version>_M<self.modified_count>+"_D<self.modified_date>".
             extension - str -   The extension to append to filename. Default: "egs". If None, no extension is appended.
+            binary -    bool -  Default: True. If False, self is pickled instead, which requires both the pickle and dill modules to be installed.
+            block_size - int -  Default: 4096. The number of members per block of the binary format.
             path -      str -   The location to which the file should be saved. If unspecified, saves to "../data/".
             overwrite - bool -  Default: False. If True, overwrites the preexisting files. If False, raises a FileAlreadyExists exception if a file with the same name already exists.
         '''
         
         if filename is None:
-            filename = self.type+"_V"+str(self.version)+"_M"+str(self.modified_count)+"_D"+str(self.modified_date)
+            filename = self.type+"_V"+str(getattr(self, 'version', None))+"_M"+str(self.modified_count)+"_D"+str(self.modified_date)
         
         kwargs['extension'] = extension
         
-        cf.save(self, filename, **kwargs)
+        if not binary:
+            cf.save(self, filename, **kwargs)
+            return
+        
+        fullfilename = cf.save_filename(filename, **kwargs)
+        
+        with open(fullfilename, "wb") as f:
+            with cst.Writer(f, self.storage_metadata(), block_size = block_size) as writer:
+                for graph in self:
+                    writer.write(self.storage_record(graph))
+            
+        return
+    
+# =============================================================================
+
+
+    def storage_metadata(self):
+        '''
+        Returns the metadata saved in the header of the binary eGraphSet format.
+        '''
+        
+        if self: graph_class = type(self[0])
+        else: graph_class = eGraph
+        
+        return {
+            'type': self.type, 
+            'class': type(self).__name__, 
+            'graph_class': graph_class.__name__, 
+            'version': getattr(self, 'version', None), 
+            'creation_date': self.creation_date, 
+            'modified_date': self.modified_date, 
+            'modified_count': self.modified_count,
+            }
+    
+    
+# =============================================================================
+
+
+    def storage_record(self, graph):
+        '''
+        Returns the common.storage.Record of the member graph.
+        '''
+        
+        invariants = self.member_invariants[graph]
+        
+        # The automorphism group is only saved if it has already been calculated.
+        group = graph.cached_count('automorphism_group')
+        
+        if group is None: generators = None
+        else: generators = group.gens()
+        
+        return cst.encode_graph(graph, certificate = self.member_certificates[graph], level = invariants.get('level', cst.MISSING), triangles_count = invariants.get('triangles_count', cst.MISSING), automorphism_generators = generators)
+    
+    
+# =============================================================================
+
+
+    @classmethod
+    def load(cls, filename, extension = "egs", path = None, graph_class = None, lazy = False):
+        '''
+        Function cls.load(filename, **kwargs): str -> eGraphSet
+        
+        Loads a set saved by self.save in the binary eGraphSet format. The set is of the subclass of cls named in the file, if it has been imported, and of class cls otherwise. The members are read one block at a time, and their canonical certificates and invariants are not recalculated.
+        
+        Options:
+            extension -     str -   Default: "egs". The extension to append to filename. If None, no extension is appended.
+            path -          str -   The location from which the file should be loaded. If unspecified, loads from "../data/".
+            graph_class -   class - Default: None. The class of the members. If None, the subclass of eGraph named in the file is used, if it has been imported, and eGraph otherwise.
+            lazy -          bool -  Default: False. If True, the file is memory-mapped instead, and a read-only MappedeGraphSet is returned, whose members are only decoded when accessed.
+        '''
+        
+        fullfilename = load_filename(filename, extension = extension, path = path)
+        
+        if lazy:
+            from MappedeGraphSet import MappedeGraphSet
+            
+            return MappedeGraphSet(fullfilename, graph_class = graph_class)
+        
+        with open(fullfilename, "rb") as f:
+            metadata, records = cst.records_iterator(f)
+            
+            graphset = subclass_named(cls, metadata.get('class'))._empty()
+            
+            if graph_class is None:
+                graph_class = subclass_named(eGraph, metadata.get('graph_class'))
+            
+            members = []
+            
+            for record in records:
+                if isinstance(record, cst.Expansion):
+                    graphset.load_expansion(record, members)
+                    continue
+                
+                graph = graphset.load_record(record, graph_class, members)
+                members.append(graph)
+                
+        for key in ['creation_date', 'modified_date']:
+            if key in metadata: setattr(graphset, key, metadata[key])
             
+        return graphset
+    
+    
+# =============================================================================
+
+
+    @classmethod
+    def _empty(cls):
+        '''
+        Returns an empty cls object, to be filled by cls.load or self.restrict.
+        '''
+        
+        return cls()
+    
+    
+# =============================================================================
+
+
+    def load_record(self, record, graph_class, members):
+        '''
+        Adds the graph of record (see common.storage) to self, and returns it. members is the list of the graphs of the previous records of the file.
+        '''
+        
+        graph = cst.decode_graph(record, graph_class)
+        
+        # The stored counts are trusted, so that they are not recalculated by the indexes.
+        set_stored_counts(graph, record)
+        
+        self.add(graph, certificate = graph.cached_count('canonical_certificate'))
+        
+        return graph
+    
+    
+# =============================================================================
+
+
+    def load_expansion(self, expansion, members):
+        '''
+        Applies the common.storage.Expansion of a checkpoint (see Family.layers_iterator) to self. members is the list of the graphs of the previous records of the file. An eGraphSet keeps no expansions, so this does nothing.
+        '''
+        
         return
     
 # # =============================================================================
@@ -260,6 +691,178 @@ class eGraphSet(setutils.IndexedSet):
 # ============================================================================= 
 
 
+def dedup_batch(graphs, certificates = None, workers = None):
+    '''
+    Function dedup_batch(graphs, **kwargs): list -> (list, list, list)
+    
+    Groups graphs by canonical certificate, and returns (unique_graphs, unique_certificates, positions), where unique_graphs holds the first graph of each isomorphism class of graphs, in the order of graphs, unique_certificates their certificates, and positions[i] the position in unique_graphs of the class of graphs[i].
+    
+    Options:
+        certificates -  list -  The canonical certificates of graphs, if already known. If None, they are calculated.
+        workers -       int -   Default: None. If greater than 1, the certificates are calculated in a pool of this many processes.
+    '''
+    
+    if certificates is None:
+        certificates = canonical_certificates(graphs, workers = workers)
+        
+    unique_graphs, unique_certificates, positions = [], [], []
+    
+    certificate_positions = dict()
+    
+    for graph, certificate in zip(graphs, certificates):
+        
+        if certificate not in certificate_positions:
+            certificate_positions[certificate] = len(unique_graphs)
+            unique_graphs.append(graph)
+            unique_certificates.append(certificate)
+            
+        positions.append(certificate_positions[certificate])
+        
+    return unique_graphs, unique_certificates, positions
+
+
+def member_class(graph):
+    '''
+    Returns the class of the copy of graph added to an eGraphSet: the class of graph if it is an eGraph, and eGraph otherwise.
+    '''
+    
+    if isinstance(graph, eGraph): return type(graph)
+    
+    return eGraph
+
+
+def canonical_certificates(graphs, workers = None):
+    '''
+    Returns the list of the canonical certificates of graphs (see eGraph.canonical_certificate). If workers is greater than 1, the certificates not already cached in the counts of graphs are calculated in a pool of this many processes, from the edge lists of graphs.
+    '''
+    
+    if workers is None or workers <= 1 or len(graphs) < 2:
+        return [canonical_certificate(graph) for graph in graphs]
+    
+    # The certificates already cached in the counts of eGraphs are not calculated again.
+    certificates = [graph.cached_count('canonical_certificate') if isinstance(graph, eGraph) else None for graph in graphs]
+    
+    missing_positions = [position for position, certificate in enumerate(certificates) if certificate is None]
+    
+    if not missing_positions: return certificates
+    
+    import multiprocessing
+    
+    tasks = [(graphs[position].vertices(), graphs[position].edges(labels = False), graphs[position].allows_multiple_edges(), graphs[position].allows_loops()) for position in missing_positions]
+    
+    pool = multiprocessing.Pool(workers)
+    
+    try:
+        for position, certificate in zip(missing_positions, pool.map(edges_certificate, tasks)):
+            certificates[position] = certificate
+            
+    finally:
+        pool.terminate()
+        pool.join()
+        
+    return certificates
+
+
+def edges_certificate(task):
+    '''
+    Returns the canonical certificate of the graph of task, a (vertices, edges, multiedges, loops) tuple. This is run by the worker processes of canonical_certificates.
+    '''
+    
+    vertices, edges, multiedges, loops = task
+    
+    return canonical_certificate(Graph([vertices, edges], format = 'vertices_and_edges', multiedges = multiedges, loops = loops))
+
+
+def set_stored_counts(graph, record):
+    '''
+    Sets the counts of graph stored in its common.storage.Record: 'level', 'triangles_count', 'canonical_certificate' and 'automorphism_group', if they were saved.
+    '''
+    
+    for count_name in ['level', 'triangles_count']:
+        if getattr(record, count_name) != cst.MISSING:
+            graph.set_count(count_name, count_value = int(getattr(record, count_name)))
+            
+    certificate = cst.decode_certificate(record)
+    
+    if certificate is not None:
+        graph.set_count('canonical_certificate', count_value = certificate)
+        
+    generators = cst.decode_automorphism_generators(record)
+    
+    if generators is not None:
+        from sage.groups.perm_gps.permgroup import PermutationGroup
+        
+        group = PermutationGroup([permutation_cycles(images) for images in generators], domain = list(range(0, graph.order())))
+        graph.set_count('automorphism_group', count_value = group)
+        
+    return
+
+
+def permutation_cycles(images):
+    '''
+    Returns the cycles of length at least 2 of the permutation of 0, 1, ..., n-1 given by the list of its images, as a list of tuples.
+    '''
+    
+    cycles = []
+    visited = set()
+    
+    for start in range(0, len(images)):
+        if start in visited: continue
+        
+        cycle = [start]
+        visited.add(start)
+        
+        while images[cycle[-1]] != start:
+            cycle.append(images[cycle[-1]])
+            visited.add(cycle[-1])
+            
+        if len(cycle) > 1: cycles.append(tuple(cycle))
+        
+    return cycles
+
+
+def load_filename(filename, extension = None, path = None):
+    '''
+    Returns the full filename of filename, as in cf.save_filename, and raises a FileDoesntExist exception if there is no such file.
+    '''
+    
+    import os.path
+    
+    if path is None:
+        path = "../data/"
+        
+    if extension is None:
+        extension = ""
+        
+    else:
+        extension = "." + extension
+        
+    fullfilename = path + filename + extension
+    
+    if not os.path.isfile(fullfilename):
+        raise FileDoesntExist('The requested file on ' + fullfilename + ' does not exist.')
+        
+    return fullfilename
+
+
+def subclass_named(cls, name):
+    '''
+    Returns the subclass of cls (or cls itself) named name, among the subclasses that have been imported. Returns cls if there is none.
+    '''
+    
+    subclasses = [cls]
+    
+    while subclasses:
+        subclass = subclasses.pop()
+        
+        if subclass.__name__ == name: return subclass
+        
+        subclasses.extend(subclass.__subclasses__())
+        
+    return cls
+
+
+
 # =============================================================================
 #     
 #   Exceptions
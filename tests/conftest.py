@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""
+The tests import the packages of the repository from its root, as the example notebooks do with sys.path.append('..'). They need SageMath, and are skipped without it.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+pytest.importorskip('sage.all')
+
+from sage.graphs.graph_generators import graphs
+
+from eGraph.eGraph import canonical_certificate
+from eGraph.DTEGraph import DTEGraph
+from eGraph.CompactGraph import CompactGraph
+
+
+def compact_descendants(max_order):
+    layer = [CompactGraph.from_graph(graphs.CompleteGraph(5))]
+    descendants = list(layer)
+
+    while layer[0].order() < max_order:
+        children = [graph.DTE(e1, e2) for graph in layer for e1, e2 in graph.DTE_edge_pairs_iterator()]
+        descendants.extend(children)
+
+        # Only one child per certificate is expanded; all the labelled children are returned.
+        layer = list(dict((child.canonical_certificate(), child) for child in children).values())
+
+    return descendants
+
+
+def test_from_graph_and_to_graph_round_trip():
+    K5 = graphs.CompleteGraph(5)
+    compact_K5 = CompactGraph.from_graph(K5)
+
+    assert compact_K5.order() == 5 and compact_K5.size() == 10
+    assert compact_K5.edges() == sorted(K5.edges(labels = False))
+    assert canonical_certificate(compact_K5.to_graph()) == canonical_certificate(K5)
+
+
+def test_DTE_and_DTR_match_DTEGraph():
+    compact_K5 = CompactGraph.from_graph(graphs.CompleteGraph(5))
+    K5 = DTEGraph(graphs.CompleteGraph(5))
+
+    for e1, e2 in compact_K5.DTE_edge_pairs_iterator():
+        compact_child = compact_K5.DTE(e1, e2)
+        child = compact_child.to_graph(graph_class = DTEGraph)
+
+        assert canonical_certificate(child) == canonical_certificate(K5.DTE(e1, e2))
+
+        for double_triangle in compact_child.double_triangle_iterator():
+            assert canonical_certificate(compact_child.DTR(double_triangle).to_graph()) == canonical_certificate(child.DTR(double_triangle))
+
+
+def test_canonical_certificates_match_isomorphism_classes():
+    descendants = compact_descendants(8)
+
+    classes = dict()
+
+    for graph in descendants:
+        classes.setdefault(graph.canonical_certificate(), set()).add(canonical_certificate(graph.to_graph()))
+
+    assert all(len(certificates) == 1 for certificates in classes.values())
+    assert len(classes) == len(set(canonical_certificate(graph.to_graph()) for graph in descendants))
+
+
+def test_canonical_certificate_of_a_symmetric_graph_is_label_invariant():
+    K44 = graphs.CompleteBipartiteGraph(4, 4)
+    compact_K44 = CompactGraph.from_graph(K44)
+
+    relabeled_K44 = K44.copy()
+    relabeled_K44.relabel([3, 6, 0, 5, 1, 7, 2, 4])
+
+    assert CompactGraph.from_graph(relabeled_K44).canonical_certificate() == compact_K44.canonical_certificate()
+    assert compact_K44.canonical_label().canonical_certificate() == compact_K44.canonical_certificate()
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+pytest.importorskip('sage.all')
+
+from sage.graphs.graph_generators import graphs
+
+from eGraph.eGraph import canonical_certificate
+from eGraph.DTEGraph import DTEGraph, ancestor_certificates
+
+
+def test_ancestor_certificates_accepts_a_generator():
+    K5 = DTEGraph(graphs.CompleteGraph(5))
+    child = K5.DTE()
+    grandchild = child.DTE()
+
+    K5_certificate = canonical_certificate(graphs.CompleteGraph(5))
+
+    certificates = ancestor_certificates(graph for graph in [K5, child, grandchild])
+
+    assert certificates == [K5_certificate]*3
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+import collections
+
+import pytest
+
+pytest.importorskip('sage.all')
+
+from sage.graphs.graph_generators import graphs
+
+from common import storage as cst
+from eGraph.DTEGraph import DTEGraph, edge_pair_key
+from eGraphSet.Family import Family
+
+
+def test_DTR_parents_map_sees_parents_added_after_their_child():
+    K5 = DTEGraph(graphs.CompleteGraph(5))
+    child = K5.DTE()
+
+    family = Family()
+    family.add_child(child)
+
+    member_child = family[0]
+
+    assert family.DTR_parents_count(member_child) == 0
+
+    family.add_child(K5)
+
+    member_K5 = family[1]
+
+    assert family.DTR_parents(member_child) == [member_K5]
+    assert family.DTR_parents_count(member_K5) == 0
+    assert list(family.ancestor_paths_iterator(member_child)) == [[0, 1]]
+
+
+def K5_family_members(workers, **kwargs):
+    K5 = DTEGraph(graphs.CompleteGraph(5))
+
+    family = Family()
+    family.add_child(K5)
+
+    for _ in range(3):
+        list(family.children_iterator(workers = workers, **kwargs))
+
+    return [family.member_certificates[member] for member in family]
+
+
+def test_parallel_children_iterator_matches_serial():
+    assert K5_family_members(workers = None) == K5_family_members(workers = 2)
+
+
+def test_parallel_children_iterator_accepts_lambda_options():
+    # Only the triangle and edges whose triangle edge contains the least vertex are expanded.
+    edge_pair_provider = lambda graph: [edge_pair for edge_pair in graph.DTE_edge_pairs_iterator() if min(graph) in edge_pair[0]]
+
+    assert K5_family_members(workers = None, edge_pair_provider = edge_pair_provider) == K5_family_members(workers = 2, edge_pair_provider = edge_pair_provider)
+
+
+def test_clear_resets_the_tree():
+    K5 = DTEGraph(graphs.CompleteGraph(5))
+
+    family = Family()
+    family.add_child(K5)
+    list(family.children_iterator())
+
+    family.clear()
+
+    assert family.tree.order() == 0 and family.tree.size() == 0
+    assert not family.expanded
+
+    family.add_child(K5.DTE())
+    family.add_child(K5)
+
+    assert family.tree_children(family[0]) == [] and family.tree_parents(family[1]) == []
+    assert family.DTR_parents(family[0]) == [family[1]]
+
+
+def test_restrict_inplace_updates_the_tree():
+    K5 = DTEGraph(graphs.CompleteGraph(5))
+
+    family = Family()
+    family.add_child(K5)
+
+    for _ in range(3):
+        list(family.children_iterator())
+
+    family.restrict({'order': [5, 7]}, inplace = True)
+
+    assert family.tree.order() == len(family)
+    assert family.tree.size() == 0
+
+
+def layer_sizes(family):
+    return sorted(collections.Counter(member.order() for member in family).items())
+
+
+def expansion_block_offsets(filename):
+    offsets = []
+
+    with open(filename, 'rb') as f:
+        cst.read_header(f)
+
+        while True:
+            offset = f.tell()
+            block_header = f.read(cst.BLOCK_STRUCT.size)
+
+            if len(block_header) < cst.BLOCK_STRUCT.size: return offsets
+
+            magic, k, payload_length = cst.BLOCK_STRUCT.unpack(block_header)
+
+            if magic == cst.EXPANSION_MAGIC: offsets.append(offset)
+
+            f.seek(payload_length, 1)
+
+
+def test_resume_after_an_interrupted_checkpoint(tmpdir):
+    K5 = DTEGraph(graphs.CompleteGraph(5))
+
+    reference = Family()
+    reference.add_child(K5)
+    list(reference.layers_iterator(max_order = 9, canonical_augmentation = True))
+
+    checkpoint = str(tmpdir.join('K5.egs'))
+
+    family = Family()
+    family.add_child(K5)
+    list(family.layers_iterator(max_order = 9, canonical_augmentation = True, checkpoint = checkpoint, checkpoint_interval = 1))
+
+    assert layer_sizes(family) == layer_sizes(reference)
+
+    with open(checkpoint, 'rb') as f:
+        content = f.read()
+
+    # The process dies after writing the records of a flush, before its expansions, or in the middle of the expansions.
+    for offset in expansion_block_offsets(checkpoint)[1:]:
+        for length in (offset, offset + cst.BLOCK_STRUCT.size + 4):
+            interrupted_checkpoint = str(tmpdir.join('interrupted.egs'))
+
+            with open(interrupted_checkpoint, 'wb') as f:
+                f.write(content[:length])
+
+            resumed_family = Family.resume(interrupted_checkpoint)
+            list(resumed_family.layers_iterator(max_order = 9, canonical_augmentation = True, checkpoint = interrupted_checkpoint, checkpoint_interval = 1))
+
+            assert layer_sizes(resumed_family) == layer_sizes(reference)
+            assert layer_sizes(Family.resume(interrupted_checkpoint)) == layer_sizes(reference)
+
+
+def K5_layers_sizes(**kwargs):
+    family = Family()
+    family.add_child(DTEGraph(graphs.CompleteGraph(5)))
+
+    return [len(layer) for layer in family.layers_iterator(max_order = 10, **kwargs)]
+
+
+def test_canonical_augmentation_layers_match_certificate_deduplication():
+    reference_sizes = K5_layers_sizes(orbit_pruning = False)
+
+    assert K5_layers_sizes(canonical_augmentation = True) == reference_sizes
+    assert K5_layers_sizes(canonical_augmentation = True, orbit_pruning = False) == reference_sizes
+
+
+def test_orbit_pruning_layers_match_certificate_deduplication():
+    assert K5_layers_sizes(orbit_pruning = True) == K5_layers_sizes(orbit_pruning = False)
+
+
+def test_orbit_pruning_yields_isomorphic_children_with_orbit_sizes():
+    K5 = DTEGraph(graphs.CompleteGraph(5))
+
+    labelled_children = list(K5.children_iterator())
+    pruned_children = list(K5.children_iterator(orbit_pruning = True, orbit_sizes = True))
+
+    edge_pair_keys = set(edge_pair_key(e1, e2) for e1, e2 in K5.DTE_edge_pairs_iterator())
+
+    assert sum(orbit_size for child, orbit_size in pruned_children) == len(edge_pair_keys)
+    assert set(child.canonical_certificate() for child, orbit_size in pruned_children) == set(child.canonical_certificate() for child in labelled_children)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+import random
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from eGraphSet.FamilyTree import FamilyTree
+
+
+def reference_edges(tree):
+    sources, targets = tree.edges()
+    return set(zip(sources.tolist(), targets.tolist()))
+
+
+def test_edges_children_and_parents_match_a_reference():
+    random.seed(0)
+
+    tree = FamilyTree()
+    tree.min_new_edges = 4
+
+    edges = set()
+
+    for child in range(1, 200):
+        tree.add_vertex(child)
+
+        for parent in random.sample(range(0, child), min(child, 3)):
+            tree.add_edge(parent, child)
+            tree.add_edge(parent, child)
+            edges.add((parent, child))
+
+    assert tree.size() == len(edges)
+    assert reference_edges(tree) == edges
+
+    for vertex in range(0, 200):
+        assert sorted(tree.children(vertex)) == sorted(c for p, c in edges if p == vertex)
+        assert sorted(tree.parents(vertex)) == sorted(p for p, c in edges if c == vertex)
+
+
+def test_remove_vertices_shifts_the_following_vertices():
+    tree = FamilyTree()
+
+    for parent, child in [(0, 1), (0, 2), (1, 3), (2, 3), (3, 4), (2, 5)]:
+        tree.add_edge(parent, child)
+
+    tree.remove_vertices([1, 4])
+
+    # 0, 2, 3, 5 become 0, 1, 2, 3.
+    assert tree.order() == 4
+    assert reference_edges(tree) == set([(0, 1), (1, 2), (1, 3)])
+
+    tree.remove_vertex(0)
+
+    assert tree.order() == 3
+    assert reference_edges(tree) == set([(0, 1), (0, 2)])
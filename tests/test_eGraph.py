@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+pytest.importorskip('sage.all')
+
+from sage.graphs.graph_generators import graphs
+
+from eGraph.eGraph import eGraph, eGraph_view
+from eGraph.DTEGraph import DTEGraph
+
+
+def test_view_as_DTEGraph_has_DTEGraph_count_functions():
+    graph = eGraph(graphs.CompleteGraph(5), immutable = True)
+    graph.count('triangles_count')
+
+    view = eGraph_view(graph, graph_class = DTEGraph)
+
+    assert isinstance(view, DTEGraph)
+    assert 'triangle_types' in view.count_functions
+    assert 'triangles' in view.count_functions
+    assert 'triangle_types' not in graph.count_functions
+
+    # The counts of graph are still shared with the view.
+    assert view.cached_count('triangles_count') == 10
+    assert len(view.count('triangles')) == 10
+
+
+def test_eGraphSet_adds_plain_sage_graphs():
+    from eGraphSet.eGraphSet import eGraphSet
+
+    graph_set = eGraphSet()
+
+    assert graph_set.add_graph(graphs.CompleteGraph(5)) is None
+    assert graph_set.add_graph(graphs.CompleteGraph(5)) is not None
+    assert graph_set.add_graphs([graphs.CycleGraph(4), graphs.CompleteGraph(5)])[1] is graph_set[0]
+    assert isinstance(graph_set[0], eGraph)
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from common.hashstore import HashStore
+
+
+@pytest.mark.parametrize('max_load', [0, 1, 1.5, -0.5])
+def test_max_load_outside_unit_interval_is_rejected(max_load):
+    with pytest.raises(ValueError):
+        HashStore(max_load = max_load)
+
+
+def test_full_load_lookups_terminate():
+    store = HashStore(capacity = 4, max_load = 0.99)
+
+    for hash_value in range(1, 100):
+        assert store.add(hash_value)
+
+    assert 1000 not in store
+    assert len(store) == 99
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from common import storage as cst
+
+
+def record(order):
+    return cst.Record(order = order, level = 0, triangles_count = cst.MISSING, flags = 0, certificate_hash = 0, edges = [], certificate = [], parents = [], automorphism_generators = [])
+
+
+class EdgeListGraph(object):
+    '''
+    The part of the sage Graph interface read by common.storage.encode_graph.
+    '''
+
+    def __init__(self, vertices, edges, multiedges = False):
+        self.vertices, self.edge_list, self.multiedges = vertices, edges, multiedges
+
+    def __iter__(self):
+        return iter(self.vertices)
+
+    def order(self):
+        return len(self.vertices)
+
+    def edge_iterator(self, labels = False):
+        return iter(self.edge_list)
+
+    def allows_multiple_edges(self):
+        return self.multiedges
+
+    def allows_loops(self):
+        return False
+
+
+def encoded_graphs():
+    graphs = [EdgeListGraph(list(range(n)), [(i, (i+1) % n) for i in range(n)]) for n in range(3, 7)]
+    graphs.append(EdgeListGraph(['a', 'b', 'c'], [('a', 'b'), ('a', 'b'), ('b', 'c')], multiedges = True))
+
+    records = []
+
+    for index, graph in enumerate(graphs):
+        n = graph.order()
+        rotation = dict((v, graph.vertices[(i+1) % n]) for i, v in enumerate(graph.vertices))
+
+        records.append(cst.encode_graph(graph, certificate = (n, tuple((i, i+1) for i in range(n-1))), level = index, triangles_count = index % 2, flags = cst.EXPANDED if index % 2 else 0, parents = list(range(index)), automorphism_generators = [rotation.get]))
+
+    return records
+
+
+def decoded_values(record):
+    return (int(record.order), int(record.level), int(record.triangles_count), int(record.flags), int(record.certificate_hash), [int(v) for v in record.edges], cst.decode_certificate(record), [int(parent) for parent in record.parents], cst.decode_automorphism_generators(record))
+
+
+def write_records(filename, records, block_size):
+    with open(filename, 'wb') as f:
+        with cst.Writer(f, {'type': 'Family'}, block_size = block_size) as writer:
+            for encoded_record in records:
+                writer.write(encoded_record)
+
+
+def test_encoded_graphs_round_trip(tmpdir):
+    filename = str(tmpdir.join('family.egs'))
+    records = encoded_graphs()
+
+    write_records(filename, records, block_size = 2)
+
+    assert records[-1].flags & cst.MULTIEDGES and not records[-1].flags & cst.LOOPS
+    assert cst.decode_automorphism_generators(records[0]) == [[1, 2, 0]]
+
+    with open(filename, 'rb') as f:
+        metadata, rows = cst.records_iterator(f)
+
+        assert metadata['type'] == 'Family'
+        assert [decoded_values(row) for row in rows] == [decoded_values(encoded_record) for encoded_record in records]
+
+    mapped_file = cst.MappedFile(filename)
+
+    assert len(mapped_file) == len(records)
+    assert [decoded_values(mapped_file.record(index)) for index in range(len(records))] == [decoded_values(encoded_record) for encoded_record in records]
+    assert decoded_values(mapped_file.record(-1)) == decoded_values(records[-1])
+    assert [(first_index, k) for first_index, k, columns in mapped_file.blocks_iterator()] == [(0, 2), (2, 2), (4, 1)]
+
+    with pytest.raises(IndexError):
+        mapped_file.record(len(records))
+
+    mapped_file.close()
+
+
+def test_incomplete_last_block_is_ignored_and_truncated(tmpdir):
+    filename = str(tmpdir.join('family.egs'))
+    records = encoded_graphs()
+
+    write_records(filename, records[:3], block_size = 2)
+
+    with open(filename, 'rb') as f:
+        complete_length = len(f.read())
+
+    # The process dies while writing a block.
+    block = cst.encode_block(cst.BLOCK_MAGIC, records[3:], {'fixed': cst.FIXED_COLUMNS, 'variable': cst.VARIABLE_COLUMNS})
+
+    with open(filename, 'ab') as f:
+        f.write(block[:len(block) // 2])
+
+    with open(filename, 'rb') as f:
+        metadata, rows = cst.records_iterator(f)
+
+        assert len(list(rows)) == 3
+
+    mapped_file = cst.MappedFile(filename)
+    assert len(mapped_file) == 3
+    mapped_file.close()
+
+    assert cst.truncate_incomplete_block(filename) == 3
+
+    with open(filename, 'rb') as f:
+        assert len(f.read()) == complete_length
+
+    with open(filename, 'ab') as f:
+        with cst.Writer(f, None) as writer:
+            for encoded_record in records[3:]:
+                writer.write(encoded_record)
+
+    with cst.MappedFile(filename) as mapped_file:
+        assert [decoded_values(mapped_file.record(index)) for index in range(len(mapped_file))] == [decoded_values(encoded_record) for encoded_record in records]
+
+
+def test_records_without_their_expansions_are_truncated(tmpdir):
+    filename = str(tmpdir.join('checkpoint.egs'))
+
+    with open(filename, 'wb') as f:
+        writer = cst.Writer(f, {}, block_size = 2, auto_flush = False)
+
+        for order in (5, 5, 5):
+            writer.write(record(order))
+
+        writer.flush(confirm = True)
+
+        writer.write(record(6))
+        writer.write_expansion(0, [3])
+        writer.flush(confirm = True)
+
+        confirmed_length = f.tell()
+
+        # The process dies after writing the records of a flush, before its expansions.
+        writer.write(record(6))
+        writer.write(record(6))
+        writer.write_expansion(1, [4, 5])
+        f.write(cst.encode_block(cst.BLOCK_MAGIC, writer.records, {'fixed': cst.FIXED_COLUMNS, 'variable': cst.VARIABLE_COLUMNS}))
+
+    assert cst.truncate_incomplete_block(filename) == 6
+    assert cst.truncate_unconfirmed_records(filename) == 4
+
+    with open(filename, 'rb') as f:
+        f.seek(0, 2)
+        assert f.tell() == confirmed_length
+
+    mapped_file = cst.MappedFile(filename)
+
+    assert [mapped_file.record(index).order for index in range(len(mapped_file))] == [5, 5, 5, 6]
+    assert list(mapped_file.expansions_iterator()) == [cst.Expansion(0, [3])]
+
+    mapped_file.close()
+
+
+def test_records_are_only_written_when_flushed_without_auto_flush(tmpdir):
+    filename = str(tmpdir.join('checkpoint.egs'))
+
+    with open(filename, 'wb') as f:
+        writer = cst.Writer(f, {}, block_size = 1, auto_flush = False)
+        header_length = f.tell()
+
+        writer.write(record(5))
+        writer.write(record(6))
+        writer.write_expansion(0, [1])
+
+        assert f.tell() == header_length
+
+    assert cst.truncate_unconfirmed_records(filename) == 0